@@ -0,0 +1,249 @@
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+import faiss
+
+INDEX_TYPES = ["flat", "ivf_flat", "ivf_pq", "hnsw"]
+# How flat/HNSW/IVF-flat indexes store vectors; IVF-PQ is always product-quantized
+VECTOR_STORAGE_TYPES = ["float32", "float16", "int8"]
+SQ_TYPES = {"float16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}
+SQ_FACTORY = {"float32": "Flat", "float16": "SQfp16", "int8": "SQ8"}
+
+# Defaults for the approximate index types
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+IVF_NPROBE = 16
+PQ_BITS = 8
+TRAIN_SAMPLE_SIZE = 50_000
+MIN_POINTS_PER_CENTROID = 39  # faiss k-means warns below this
+
+
+def choose_index_type(n_vectors: int) -> str:
+    """Automatic policy: exact search for small corpora, ANN as they grow"""
+    if n_vectors < 10_000:
+        return "flat"
+    if n_vectors < 200_000:
+        return "hnsw"
+    if n_vectors < 2_000_000:
+        return "ivf_flat"
+    return "ivf_pq"
+
+
+def _ivf_nlist(n_vectors: int, n_train: Optional[int] = None) -> int:
+    """Lists for n_vectors, keeping MIN_POINTS_PER_CENTROID training points per list"""
+    nlist = int(4 * math.sqrt(n_vectors))
+    n_train = n_vectors if n_train is None else n_train
+    return max(1, min(nlist, n_train // MIN_POINTS_PER_CENTROID))
+
+
+def _pq_subquantizers(dim: int) -> int:
+    """Largest divisor of dim up to 64, keeping at least 8 dimensions per sub-quantizer"""
+    for m in range(min(64, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def factory_string(index_type: str, n_vectors: int, dim: int, storage: str = "float32",
+                   n_train: Optional[int] = None) -> str:
+    """faiss.index_factory description for an index type sized to the corpus (and its training sample)"""
+    if storage not in VECTOR_STORAGE_TYPES:
+        raise ValueError(f"Unknown vector storage: {storage}. Choose from {VECTOR_STORAGE_TYPES}")
+    if index_type == "flat":
+        return SQ_FACTORY[storage]
+    if index_type == "hnsw":
+        return f"HNSW{HNSW_M}" + ("" if storage == "float32" else f",{SQ_FACTORY[storage]}")
+    if index_type == "ivf_flat":
+        return f"IVF{_ivf_nlist(n_vectors, n_train)},{SQ_FACTORY[storage]}"
+    if index_type == "ivf_pq":
+        return f"IVF{_ivf_nlist(n_vectors, n_train)},PQ{_pq_subquantizers(dim)}x{PQ_BITS}"
+    raise ValueError(f"Unknown index type: {index_type}. Choose from {INDEX_TYPES + ['auto']}")
+
+
+def new_index(dim: int, index_type: str, n_vectors: int, metric: int = faiss.METRIC_L2,
+              storage: str = "float32", n_train: Optional[int] = None):
+    """Create an empty (untrained) index of the requested type and vector storage, sized for n_vectors.
+
+    `n_train` is how many vectors it will be trained on (default: all n_vectors).
+    """
+    n_train = n_vectors if n_train is None else n_train
+    if index_type == "auto":
+        index_type = choose_index_type(n_vectors)
+    # PQ codebooks need 2**PQ_BITS training points per sub-quantizer
+    if index_type == "ivf_pq" and n_train < (1 << PQ_BITS) * MIN_POINTS_PER_CENTROID:
+        index_type = "ivf_flat"
+    # IVF needs at least one training point per centroid
+    if index_type.startswith("ivf") and n_train == 0:
+        index_type = "flat"
+    # int8 ranges are trained from data
+    if storage == "int8" and n_train == 0:
+        storage = "float32"
+
+    if index_type == "hnsw":
+        if storage == "float32":
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, metric)
+        else:
+            index = faiss.IndexHNSWSQ(dim, SQ_TYPES[storage], HNSW_M, metric)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    else:
+        index = faiss.index_factory(dim, factory_string(index_type, n_vectors, dim, storage, n_train), metric)
+        if index_type == "ivf_pq":
+            # Polysemous codes are never used at search time and dominate training cost
+            faiss.downcast_index(index).do_polysemous_training = False
+    return index
+
+
+def build_index(vectors: np.ndarray, index_type: str = "auto",
+                metric: int = faiss.METRIC_L2, train_sample_size: int = TRAIN_SAMPLE_SIZE,
+                seed: int = 1234, storage: str = "float32"):
+    """Build, train (on a random sample) and fill a FAISS index of the requested type"""
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    n_vectors, dim = vectors.shape
+    index = new_index(dim, index_type, n_vectors, metric, storage, min(n_vectors, train_sample_size))
+
+    if not index.is_trained:
+        sample = vectors
+        if n_vectors > train_sample_size:
+            rng = np.random.default_rng(seed)
+            sample = vectors[rng.choice(n_vectors, train_sample_size, replace=False)]
+        index.train(sample)
+
+    index.add(vectors)
+    set_search_params(index)
+    return index
+
+
+class IncrementalIndexBuilder:
+    """Fill an index from vector batches as they arrive, without holding the whole corpus.
+
+    The first `train_sample_size` vectors are buffered; once the buffer is full
+    (or the stream ends) the index type is resolved, trained on the buffer and
+    every later batch is added directly to the index. A full buffer means the
+    stream goes on, so the index is then sized for `expected_total` (when
+    larger): without it "auto" could never pick the IVF tiers. If the stream
+    ends first, the actual count is used.
+    """
+
+    def __init__(self, dim: int, index_type: str = "auto", metric: int = faiss.METRIC_L2,
+                 train_sample_size: int = TRAIN_SAMPLE_SIZE, storage: str = "float32",
+                 expected_total: Optional[int] = None):
+        self.dim = dim
+        self.index_type = index_type
+        self.expected_total = expected_total
+        self.metric = metric
+        self.storage = storage
+        self.train_sample_size = train_sample_size
+        self.index = None
+        self.ntotal = 0
+        self._pending: List[np.ndarray] = []
+        self._pending_count = 0
+
+    def add(self, vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        self.ntotal += len(vectors)
+        if self.index is not None:
+            self.index.add(vectors)
+            return
+        self._pending.append(vectors)
+        self._pending_count += len(vectors)
+        if self._pending_count >= self.train_sample_size:
+            self._create_index(max(self.ntotal, self.expected_total or 0))
+
+    def _create_index(self, n_vectors: int) -> None:
+        if self._pending:
+            buffered = np.concatenate(self._pending)
+        else:
+            buffered = np.empty((0, self.dim), dtype="float32")
+        self._pending, self._pending_count = [], 0
+
+        self.index = new_index(self.dim, self.index_type, n_vectors, self.metric, self.storage, len(buffered))
+        if not self.index.is_trained:
+            self.index.train(buffered)
+        self.index.add(buffered)
+        set_search_params(self.index)
+
+    def finish(self):
+        """Return the filled index (an empty one if nothing was added)"""
+        if self.index is None:
+            self._create_index(self.ntotal)
+        return self.index
+
+
+def set_search_params(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+    """Apply query-time knobs (stored with the index by faiss.write_index)"""
+    try:
+        ivf = faiss.extract_index_ivf(index)
+        ivf.nprobe = min(nprobe or IVF_NPROBE, ivf.nlist)
+    except RuntimeError:
+        pass  # not an IVF index
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search or HNSW_EF_SEARCH
+
+
+def filtered_search_params(index, ids: np.ndarray):
+    """SearchParameters limiting index.search to the given vector ids, keeping the index's own knobs"""
+    selector = faiss.IDSelectorBatch(np.ascontiguousarray(ids, dtype="int64"))
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    if isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+def rerank_exact(query_vectors: np.ndarray, candidate_ids: np.ndarray, vectors: np.ndarray, k: int,
+                 metric: int = faiss.METRIC_L2) -> Tuple[np.ndarray, np.ndarray]:
+    """Re-score each query's candidates against full-precision `vectors` and keep the best k.
+
+    `vectors` only needs row indexing (e.g. a memory-mapped float32 array), so
+    just the candidate rows are read. Returns (D, I) shaped like index.search,
+    padded with -1 ids; L2 distances are squared, as in FAISS.
+    """
+    n_queries = len(query_vectors)
+    D = np.full((n_queries, k), np.inf if metric == faiss.METRIC_L2 else -np.inf, dtype="float32")
+    I = np.full((n_queries, k), -1, dtype="int64")
+    for row in range(n_queries):
+        ids = np.sort(candidate_ids[row][candidate_ids[row] >= 0])  # ascending rows read the mmap in order
+        if not len(ids):
+            continue
+        candidates = np.asarray(vectors[ids], dtype="float32")
+        if metric == faiss.METRIC_L2:
+            scores = ((candidates - query_vectors[row]) ** 2).sum(axis=1)
+            order = np.argsort(scores, kind="stable")[:k]
+        else:
+            scores = candidates @ query_vectors[row]
+            order = np.argsort(-scores, kind="stable")[:k]
+        D[row, :len(order)] = scores[order]
+        I[row, :len(order)] = ids[order]
+    return D, I
+
+
+def range_search(index, query_vectors: np.ndarray, threshold: float, k: int,
+                 params=None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Per query, (ids, scores) of at most k hits past `threshold`, best first.
+
+    Uses FAISS range search, so only hits past the threshold come back instead
+    of a fixed-size top-k list. For inner-product indexes that is score >
+    threshold; for L2, squared distance < threshold.
+    """
+    if isinstance(index, faiss.IndexHNSW):
+        # HNSW range search only reports nodes its beam visits
+        ef_search = max(index.hnsw.efSearch, k)
+        if params is None:
+            params = faiss.SearchParametersHNSW(efSearch=ef_search)
+        else:
+            params.efSearch = max(params.efSearch, ef_search)
+    lims, D, I = index.range_search(np.ascontiguousarray(query_vectors, dtype="float32"), threshold,
+                                    params=params)
+    descending = index.metric_type == faiss.METRIC_INNER_PRODUCT
+    hits = []
+    for row in range(len(query_vectors)):
+        scores, ids = D[lims[row]:lims[row + 1]], I[lims[row]:lims[row + 1]]
+        keys = -scores if descending else scores
+        if len(keys) > k:
+            top = np.argpartition(keys, k - 1)[:k]
+            scores, ids, keys = scores[top], ids[top], keys[top]
+        order = np.argsort(keys, kind="stable")
+        hits.append((ids[order], scores[order]))
+    return hits
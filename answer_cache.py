@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question, ignoring trailing punctuation"""
+    return " ".join(question.lower().split()).rstrip("?.! ")
+
+
+def answer_cache_key(document_hash: str, question: str, chunk_ids: List[int], model: str) -> str:
+    payload = json.dumps([document_hash, normalize_question(question), list(chunk_ids), model])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryAnswerCache:
+    """In-process LRU of answers with a TTL"""
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 86_400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, answer: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class DiskAnswerCache:
+    """SQLite-backed answer cache with a TTL, shared by every worker on the host.
+
+    Hits record their access time in memory and write it back in batches.
+    Expired and least recently used rows are evicted only once the table may
+    have grown past `max_entries`, down to EVICT_TO of it so that eviction
+    runs once per many puts rather than on every one.
+    """
+
+    TOUCH_BATCH = 256  # buffered hit times written back at once
+    EVICT_TO = 0.9  # share of max_entries kept after an eviction
+
+    def __init__(self, path: str, ttl: float = 86_400, max_entries: int = 100_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers "
+            "(key TEXT PRIMARY KEY, answer TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_used ON answers (used)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_expires ON answers (expires)")
+        # Upper bound on the rows in the table; other workers' puts are picked up at the next recount
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer FROM answers WHERE key = ? AND expires >= ?", (key, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.TOUCH_BATCH:
+                self._flush_touched()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, answer: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, answer, expires, used) VALUES (?, ?, ?, ?)",
+                (key, answer, now + self.ttl, now)
+            )
+            self._touched.pop(key, None)
+            self._rows += 1
+            if self._rows > self.max_entries:
+                self._evict(now)
+
+    def _flush_touched(self) -> None:
+        self._conn.executemany(
+            "UPDATE answers SET used = ? WHERE key = ?", [(used, key) for key, used in self._touched.items()]
+        )
+        self._touched.clear()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows, then the least recently used down to EVICT_TO of max_entries"""
+        self._flush_touched()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute("DELETE FROM answers WHERE expires < ?", (now,))
+            keep = int(self.max_entries * self.EVICT_TO)
+            cutoff = self._conn.execute(
+                "SELECT used FROM answers ORDER BY used DESC LIMIT 1 OFFSET ?", (keep,)
+            ).fetchone()
+            if cutoff is not None:
+                self._conn.execute("DELETE FROM answers WHERE used <= ?", cutoff)
+            self._rows = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._flush_touched()
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return {"backend": "disk", "entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+def open_answer_cache(backend: str, path: str, ttl: float, max_entries: int):
+    """Answer cache for a backend name ("memory", "disk" or "none")"""
+    if backend == "memory":
+        return MemoryAnswerCache(max_entries=max_entries, ttl=ttl)
+    if backend == "disk":
+        return DiskAnswerCache(path, ttl=ttl, max_entries=max_entries)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown answer cache backend: {backend}")
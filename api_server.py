@@ -4,21 +4,162 @@ warnings.filterwarnings("ignore", category=RuntimeWarning, module="numpy")
 
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, HttpUrl, field_validator
-from typing import List, Union
+from pydantic import BaseModel, HttpUrl, field_validator, model_validator
+from typing import Dict, List, Optional, Union
+from contextlib import asynccontextmanager
+import asyncio
 import os
+import json
+import hashlib
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import tempfile
 import requests
 from pathlib import Path
 import logging
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 load_dotenv()
 
+# Import functions from main.py
+from main import (
+    EMBEDDING_MODEL_NAME,
+    EMBED_BATCH_SIZE,
+    index_config,
+    extract_meaningful_chunks,
+    iter_meaningful_chunks,
+    extract_docx_chunks,
+    extract_email_chunks,
+    parse_query,
+    build_faiss_index_streaming,
+    estimate_pdf_chunks,
+    build_improved_faiss_index,
+    merge_document_chunks,
+    document_label,
+    embed_texts,
+    build_keyword_index,
+    hybrid_search_by_vectors,
+    pack_retrieved_chunks,
+    describe_packing,
+    create_fallback_response
+)
+from model_registry import registry
+from index_cache import IndexCache, hash_file, make_cache_key
+from llm_client import AsyncLLMClient
+from answer_cache import open_answer_cache, answer_cache_key
+from semantic_cache import SemanticQueryCache
+from downloader import open_download, save_response, url_suffix, DownloadTooLargeError
+from jobs import Job, JobManager, JobQueueFull, SUCCEEDED, FAILED
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Encoders loaded once per worker at startup and shared by every request
+PRELOAD_MODELS = [
+    name.strip() for name in os.getenv("PRELOAD_MODELS", EMBEDDING_MODEL_NAME).split(",") if name.strip()
+]
+
+# Built indexes are cached on disk by document content hash + index config
+index_cache = IndexCache(
+    os.getenv("INDEX_CACHE_DIR", ".index_cache"),
+    max_bytes=int(os.getenv("INDEX_CACHE_MAX_MB", "1024")) * 1024 * 1024
+)
+
+# LLM answers cached by (document hash, question, retrieved chunk ids, model chain)
+answer_cache = open_answer_cache(
+    os.getenv("ANSWER_CACHE_BACKEND", "memory"),  # memory, disk or none
+    path=os.getenv("ANSWER_CACHE_PATH", ".answer_cache/answers.sqlite3"),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", "86400")),
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "10000"))
+)
+
+# Answers reused for near-duplicate questions about the same document (empty threshold disables)
+SEMANTIC_CACHE_THRESHOLD = os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")
+semantic_cache = SemanticQueryCache(float(SEMANTIC_CACHE_THRESHOLD)) if SEMANTIC_CACHE_THRESHOLD else None
+
+# Shared pooled LLM client, created and closed with the app
+llm_client: AsyncLLMClient = None
+
+# CPU-bound stages run off the event loop: encoding, FAISS and index builds on
+# threads (they release the GIL), PDF page extraction optionally in processes
+CPU_THREADS = int(os.getenv("CPU_THREADS", "4"))
+EXTRACT_PROCESSES = int(os.getenv("EXTRACT_PROCESSES", "0"))  # 0/1 = extract on the CPU thread
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_THREADS, thread_name_prefix="cpu")
+extract_executor: ProcessPoolExecutor = None
+
+# Documents per request; they are indexed in parallel and searched as one corpus
+MAX_DOCUMENTS_PER_REQUEST = int(os.getenv("MAX_DOCUMENTS_PER_REQUEST", "10"))
+
+# Synchronous /hackrx/run requests processed at once; more get 429 + Retry-After
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "4"))
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "5"))
+
+class ConcurrencyLimiter:
+    """Counts requests in flight and refuses new ones past `limit`; used from the event loop only"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        if self.active >= self.limit:
+            self.rejected += 1
+            return False
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {"active": self.active, "limit": self.limit, "rejected": self.rejected}
+
+request_limiter = ConcurrencyLimiter(MAX_CONCURRENT_REQUESTS)
+
+def too_many_requests(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+async def run_cpu(fn, *args, **kwargs):
+    """Run a CPU-bound call on the CPU thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, partial(fn, *args, **kwargs))
+
+def preload_models():
+    try:
+        logger.info(f"Preloading embedding models: {PRELOAD_MODELS}")
+        registry.preload(PRELOAD_MODELS)
+        logger.info(f"Embedding models ready: {registry.status()['loaded']}")
+    except Exception as e:
+        logger.error(f"Failed to preload embedding models: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load in the background so /api/v1/health can report "loading" meanwhile
+    global llm_client, extract_executor
+    loop = asyncio.get_running_loop()
+    preload_task = loop.run_in_executor(None, preload_models)
+    if EXTRACT_PROCESSES > 1:
+        extract_executor = ProcessPoolExecutor(max_workers=EXTRACT_PROCESSES)
+    llm_client = AsyncLLMClient()
+    await job_manager.start()
+    yield
+    await job_manager.stop()
+    await llm_client.aclose()
+    await preload_task
+    if extract_executor is not None:
+        extract_executor.shutdown(cancel_futures=True)
+
 app = FastAPI(
     title="Document Processing API",
     description="API for processing documents and answering questions using embeddings + LLM",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -30,23 +171,6 @@ app.add_middleware(
 )
 
 
-# Import functions from your hackv2.py
-from hackv2 import (
-    extract_meaningful_chunks,
-    extract_docx_chunks,
-    extract_email_chunks,
-    parse_query,
-    build_improved_faiss_index,
-    search_relevant_chunks,
-    get_structured_response,
-    create_fallback_response
-)
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-
 # Authentication
 security = HTTPBearer()
 VALID_TOKEN = "83ed36577e07551b01b01c042d83a77a57df1cd94d7a95e65ee8b7324a47ad2c"
@@ -63,8 +187,11 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
 
 # Request/Response Models
 class ProcessRequest(BaseModel):
-    documents: Union[HttpUrl, str]
+    documents: Union[HttpUrl, str, List[str]]
     questions: List[str]
+    # Optional retrieval controls for multi-document requests, by position in `documents`
+    filter_documents: Optional[List[int]] = None
+    document_boosts: Optional[Dict[int, float]] = None
 
     @field_validator('questions')
     @classmethod
@@ -78,28 +205,44 @@ class ProcessRequest(BaseModel):
     @field_validator('documents')
     @classmethod
     def validate_documents(cls, v):
-        if isinstance(v, str):
-            if v.startswith('http'):
-                return v
-            v_abs = os.path.abspath(v)
-            if not os.path.exists(v_abs):
-                raise ValueError(f"File not found: {v_abs}")
-            return v_abs
-        raise ValueError("Document must be a URL or file path string")
+        """Normalize to a list of URLs / absolute paths"""
+        documents = v if isinstance(v, list) else [v]
+        if not documents:
+            raise ValueError('At least one document is required')
+        if len(documents) > MAX_DOCUMENTS_PER_REQUEST:
+            raise ValueError(f'Maximum {MAX_DOCUMENTS_PER_REQUEST} documents allowed per request')
+        normalized = []
+        for doc in documents:
+            if not isinstance(doc, str):
+                raise ValueError("Document must be a URL or file path string")
+            if doc.startswith('http'):
+                normalized.append(doc)
+                continue
+            doc_abs = os.path.abspath(doc)
+            if not os.path.exists(doc_abs):
+                raise ValueError(f"File not found: {doc_abs}")
+            normalized.append(doc_abs)
+        return normalized
+
+    @model_validator(mode='after')
+    def validate_document_ids(self):
+        referenced = list(self.filter_documents or []) + list(self.document_boosts or {})
+        for document_id in referenced:
+            if not 0 <= document_id < len(self.documents):
+                raise ValueError(f"Document index {document_id} out of range (0-{len(self.documents) - 1})")
+        return self
 
 class ProcessResponse(BaseModel):
     answers: List[str]
 
-def download_file(url: str, allowed_extensions: List[str] = ['.pdf', '.docx', '.eml', '.msg']) -> str:
+def download_file(url: str, allowed_extensions: List[str] = ['.pdf', '.docx', '.eml', '.msg']) -> tuple:
+    """Stream a document to a temp file; returns (path, sha256 of its bytes)"""
     try:
         logger.info(f"Downloading file from: {url}")
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
+        response = open_download(url)
 
-        file_ext = None
-        if url.lower().endswith(tuple(allowed_extensions)):
-            file_ext = Path(url).suffix.lower()
-        else:
+        file_ext = url_suffix(url)
+        if file_ext not in allowed_extensions:
             content_type = response.headers.get('Content-Type', '').lower()
             if 'pdf' in content_type:
                 file_ext = '.pdf'
@@ -109,15 +252,20 @@ def download_file(url: str, allowed_extensions: List[str] = ['.pdf', '.docx', '.
                 file_ext = '.eml'
 
         if not file_ext or file_ext not in allowed_extensions:
+            response.close()
             raise ValueError(f"Unsupported file type. Allowed: {allowed_extensions}")
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-            tmp_file.write(response.content)
-            tmp_path = tmp_file.name
+        tmp_path, document_hash = save_response(response, suffix=file_ext)
 
         logger.info(f"File downloaded successfully to: {tmp_path}")
-        return tmp_path
+        return tmp_path, document_hash
 
+    except DownloadTooLargeError as e:
+        logger.error(f"Document too large: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Document too large: {str(e)}"
+        )
     except requests.RequestException as e:
         logger.error(f"Failed to download file: {e}")
         raise HTTPException(
@@ -154,6 +302,21 @@ def extract_chunks_by_type(file_path: str) -> list:
             detail=f"Failed to process document: {str(e)}"
         )
 
+def iter_chunks_by_type(file_path: str):
+    """Yield chunks as they are extracted; PDFs stream page by page"""
+    if Path(file_path).suffix.lower() != '.pdf':
+        yield from extract_chunks_by_type(file_path)
+        return
+
+    try:
+        yield from iter_meaningful_chunks(file_path, workers=EXTRACT_PROCESSES, executor=extract_executor)
+    except Exception as e:
+        logger.error(f"Error extracting chunks from {file_path}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process document: {str(e)}"
+        )
+
 def cleanup_file(file_path: str):
     try:
         if os.path.exists(file_path) and file_path.startswith(tempfile.gettempdir()):
@@ -180,91 +343,287 @@ def extract_basic_text_chunks(file_path: str) -> list:
         logger.error(f"Failed to extract basic text from {file_path}: {e}")
     return chunks
 
+def load_or_build_index(file_path: str, document_hash: str = None, progress=None):
+    """Return (model, index, metadatas, keyword_index) for a document, reusing cached indexes when possible"""
+    model = registry.get(EMBEDDING_MODEL_NAME)
+    cache_key = make_cache_key(document_hash or hash_file(file_path), index_config())
+
+    cached = index_cache.get(cache_key)
+    if cached is not None:
+        index, metadatas, keyword_index = cached
+        logger.info(f"Index cache hit ({len(metadatas)} chunks), skipping extraction and embedding")
+        if keyword_index is None:
+            keyword_index = build_keyword_index(metadatas)
+        return model, index, metadatas, keyword_index
+
+    # Extraction, embedding and indexing run as one stream of micro-batches
+    logger.info("Extracting chunks and building FAISS index...")
+    try:
+        chunks = iter_chunks_by_type(file_path)
+        if progress is not None:
+            chunks = counting_chunks(chunks, progress)
+        expected_chunks = estimate_pdf_chunks(file_path) if Path(file_path).suffix.lower() == '.pdf' else None
+        model, index, metadatas = build_faiss_index_streaming(chunks, model=model, expected_chunks=expected_chunks)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to build FAISS index: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to build search index"
+        )
+
+    if not metadatas:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No meaningful content could be extracted from the document"
+        )
+
+    logger.info(f"Indexed {len(metadatas)} chunks")
+    keyword_index = build_keyword_index(metadatas)
+
+    try:
+        index_cache.put(cache_key, index, metadatas, keyword_index)
+    except Exception as e:
+        logger.warning(f"Failed to cache index: {e}")
+
+    return model, index, metadatas, keyword_index
+
+async def answer_question(i: int, total: int, question: str, relevant_chunks: list,
+                          document_hash: str) -> tuple:
+    """Answer one question; returns (answer, source), source being answer_cache, llm, fallback or error"""
+    logger.info(f"Processing question {i+1}/{total}: {question[:100]}...")
+
+    try:
+        loop = asyncio.get_running_loop()
+        cache_key = None
+        if answer_cache is not None:
+            chunk_ids = [chunk["chunk_id"] for chunk in relevant_chunks]
+            cache_key = answer_cache_key(document_hash, question, chunk_ids, llm_client.chain_name)
+            # The disk backend does SQLite I/O, so cache calls stay off the event loop
+            cached = await loop.run_in_executor(None, answer_cache.get, cache_key)
+            if cached is not None:
+                logger.info(f"Question {i+1} answered from cache")
+                return cached, "answer_cache"
+
+        parsed_query = parse_query(question)
+        try:
+            model_name, answer = await llm_client.answer_with_model(question, relevant_chunks)
+            source = "llm" if model_name is not None else "fallback"
+            if model_name is None and relevant_chunks:
+                # Every model failed or is circuit-broken: answer from the chunks themselves
+                answer = create_fallback_response(parsed_query, relevant_chunks)['justification']
+            # Only real LLM answers are cached, never fallbacks from failed calls
+            if cache_key is not None and model_name is not None:
+                await loop.run_in_executor(None, answer_cache.put, cache_key, answer)
+        except Exception as llm_error:
+            logger.warning(f"LLM failed for question {i+1}, using fallback: {llm_error}")
+            fallback_response = create_fallback_response(parsed_query, relevant_chunks)
+            answer = fallback_response['justification']
+            source = "fallback"
+
+        logger.info(f"Question {i+1} processed successfully")
+        return answer, source
+
+    except Exception as e:
+        logger.error(f"Error processing question {i+1}: {e}")
+        return f"Error processing question: {str(e)}", "error"
+
 @app.get("/")
 async def root():
     return {"message": "Document Processing API is running", "version": "1.0.0"}
 
 @app.get("/api/v1/health")
 async def health_check():
-    return {
-        "status": "healthy",
+    ready = registry.is_ready(PRELOAD_MODELS)
+    models = registry.status()
+    content = {
+        "status": "healthy" if ready else ("unhealthy" if models["errors"] else "loading"),
         "service": "document-processing-api",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "models": models
+    }
+    # Not-ready workers answer 503 so load balancers keep traffic away until warm
+    return JSONResponse(
+        content=content,
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+@app.get("/api/v1/metrics")
+async def metrics():
+    """Per-model LLM routing metrics (circuit state, latency percentiles, hedges) and cache stats"""
+    return {
+        "llm_models": llm_client.router.metrics() if llm_client else {},
+        "answer_cache": answer_cache.stats() if answer_cache is not None else None,
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None,
+        "jobs": job_manager.stats(),
+        "requests": request_limiter.stats()
     }
 
-@app.post("/api/v1/hackrx/run", response_model=ProcessResponse)
-async def process_documents(
-    request: ProcessRequest,
-    token: str = Depends(verify_token)
-):
-    temp_file_path = None
+def report_nothing(stage: str, **progress):
+    pass
+
+def counting_chunks(chunks, progress):
+    """Pass chunks through while reporting how many have been extracted"""
+    for n, chunk in enumerate(chunks, 1):
+        if n % 50 == 0:
+            progress("indexing", chunks=n)
+        yield chunk
+
+async def index_document(source: str, temp_paths: List[str], progress=None) -> tuple:
+    """Download (if a URL), hash and index one document; returns (document_hash, model, index, metadatas, keyword_index)"""
+    loop = asyncio.get_running_loop()
+    if source.startswith('http'):
+        if progress is not None:
+            progress("downloading")
+        # Hashed while streaming, so the cache lookup needs no second read
+        file_path, document_hash = await loop.run_in_executor(None, download_file, source)
+        temp_paths.append(file_path)
+    else:
+        file_path = source
+        if not os.path.exists(file_path):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Local file not found: {file_path}"
+            )
+        document_hash = await loop.run_in_executor(None, hash_file, file_path)
+
+    if progress is not None:
+        progress("indexing", chunks=0)
+    return (document_hash, *await run_cpu(load_or_build_index, file_path, document_hash, progress))
+
+def load_or_build_corpus_index(sources: List[str], indexed: List[tuple]) -> tuple:
+    """One shared index over several documents' chunks, tagged with their document_id.
+
+    Per-document chunks come from their own (cached) indexes and the vectors
+    from the embedding cache, so only the shared FAISS/BM25 build is new work.
+    Returns (corpus_hash, model, index, metadatas, keyword_index).
+    """
+    corpus = [[document_hash, document_label(source)] for source, (document_hash, *_) in zip(sources, indexed)]
+    corpus_hash = hashlib.sha256(json.dumps(corpus).encode("utf-8")).hexdigest()
+    cache_key = make_cache_key(corpus_hash, index_config())
+    model = indexed[0][1]
+
+    cached = index_cache.get(cache_key)
+    if cached is not None:
+        index, metadatas, keyword_index = cached
+        logger.info(f"Corpus index cache hit ({len(sources)} documents, {len(metadatas)} chunks)")
+        if keyword_index is None:
+            keyword_index = build_keyword_index(metadatas)
+        return corpus_hash, model, index, metadatas, keyword_index
+
+    chunks = merge_document_chunks(sources, [metadatas for _, _, _, metadatas, _ in indexed])
+    model, index, metadatas = build_improved_faiss_index(chunks, model=model)
+    keyword_index = build_keyword_index(metadatas)
+    logger.info(f"Built shared index over {len(sources)} documents ({len(metadatas)} chunks)")
 
     try:
-        logger.info(f"Processing request with {len(request.questions)} questions")
+        index_cache.put(cache_key, index, metadatas, keyword_index)
+    except Exception as e:
+        logger.warning(f"Failed to cache corpus index: {e}")
 
-        if request.documents.startswith('http'):
-            temp_file_path = download_file(request.documents)
-            file_path = temp_file_path
-        else:
-            file_path = request.documents
-            if not os.path.exists(file_path):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Local file not found: {file_path}"
-                )
+    return corpus_hash, model, index, metadatas, keyword_index
 
-        logger.info("Extracting chunks from document...")
-        chunks = extract_chunks_by_type(file_path)
+async def run_pipeline(request: ProcessRequest, progress=report_nothing) -> List[str]:
+    """Download, index and answer one request; `progress(stage, **info)` is told as each stage starts"""
+    temp_paths = []
 
-        if not chunks:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No meaningful content could be extracted from the document"
-            )
-
-        logger.info(f"Extracted {len(chunks)} chunks")
+    try:
+        sources = request.documents
+        logger.info(f"Processing request with {len(sources)} document(s) and {len(request.questions)} questions")
 
-        logger.info("Building FAISS index...")
-        try:
-            model, index, metadatas = build_improved_faiss_index(chunks)
-        except Exception as e:
-            logger.error(f"Failed to build FAISS index: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to build search index"
+        if len(sources) == 1:
+            document_hash, model, index, metadatas, keyword_index = await index_document(
+                sources[0], temp_paths, progress
+            )
+        else:
+            # Documents are downloaded and indexed concurrently; each failure surfaces after all finish
+            progress("indexing", documents=0, total=len(sources))
+            done = 0
+
+            async def index_and_report(source):
+                nonlocal done
+                result = await index_document(source, temp_paths)
+                done += 1
+                progress("indexing", documents=done)
+                return result
+
+            indexed = await asyncio.gather(*[index_and_report(source) for source in sources],
+                                           return_exceptions=True)
+            for result in indexed:
+                if isinstance(result, BaseException):
+                    raise result
+            document_hash, model, index, metadatas, keyword_index = await run_cpu(
+                load_or_build_corpus_index, sources, indexed
             )
 
-        answers = []
-
-        for i, question in enumerate(request.questions):
-            logger.info(f"Processing question {i+1}/{len(request.questions)}: {question[:100]}...")
+        # Filters and boosts change retrieval, so near-duplicate answers are only shared within one setting
+        cache_scope = document_hash
+        if request.filter_documents is not None or request.document_boosts:
+            cache_scope += json.dumps([sorted(request.filter_documents or []),
+                                       sorted((request.document_boosts or {}).items())])
+
+        questions = request.questions
+        progress("retrieving", questions=len(questions))
+        # One encoder pass for every question in the request
+        query_vectors = await run_cpu(embed_texts, model, questions, EMBED_BATCH_SIZE, 0)
+
+        answers = [None] * len(questions)
+        answer_sources = [None] * len(questions)
+        if semantic_cache is not None:
+            for i, hit in enumerate(semantic_cache.lookup(cache_scope, query_vectors)):
+                if hit is not None:
+                    logger.info(f"Question {i+1} reuses the answer to a similar question "
+                                f"(cosine {hit['similarity']:.3f}): {hit['question'][:100]}")
+                    answers[i], answer_sources[i] = hit["answer"], "semantic_cache"
+        pending = [i for i in range(len(questions)) if answers[i] is None]
+
+        # Hybrid FAISS + BM25 retrieval (one index.search) for the questions still to answer
+        all_relevant_chunks = await run_cpu(
+            hybrid_search_by_vectors,
+            [questions[i] for i in pending], query_vectors[pending],
+            index, metadatas, keyword_index, 10,
+            documents=request.filter_documents, document_boosts=request.document_boosts
+        )
+        # Deduplicate and trim each question's chunks to the prompt token budget
+        all_packed = await run_cpu(pack_retrieved_chunks, all_relevant_chunks, index, metadatas)
+        all_relevant_chunks = []
+        for i, (context_chunks, packing) in zip(pending, all_packed):
+            logger.info(f"Question {i+1} context: {describe_packing(packing)}")
+            all_relevant_chunks.append(context_chunks)
+
+        # LLM calls run concurrently (bounded by the client's semaphore)
+        answered = len(questions) - len(pending)
+        progress("answering", answered=answered, total=len(questions))
+
+        async def answer_and_report(i, relevant_chunks):
+            nonlocal answered
+            result = await answer_question(i, len(questions), questions[i], relevant_chunks, document_hash)
+            answered += 1
+            progress("answering", answered=answered)
+            return result
+
+        results = await asyncio.gather(*[
+            answer_and_report(i, relevant_chunks)
+            for i, relevant_chunks in zip(pending, all_relevant_chunks)
+        ])
+        for i, (answer, source) in zip(pending, results):
+            answers[i], answer_sources[i] = answer, source
+
+        if semantic_cache is not None:
+            fresh = [i for i in pending if answer_sources[i] == "llm"]
+            semantic_cache.add(
+                cache_scope, query_vectors[fresh],
+                [questions[i] for i in fresh], [answers[i] for i in fresh]
+            )
 
-            try:
-                parsed_query = parse_query(question)
-                relevant_chunks = search_relevant_chunks(
-                    question, model, index, metadatas, k=10
-                )
-                try:
-                    answer = get_structured_response(question, parsed_query, relevant_chunks)
-                    if isinstance(answer, dict):
-                        if 'justification' in answer:
-                            answer = answer['justification']
-                        else:
-                            answer = str(answer)
-                except Exception as llm_error:
-                    logger.warning(f"LLM failed for question {i+1}, using fallback: {llm_error}")
-                    fallback_response = create_fallback_response(parsed_query, relevant_chunks)
-                    answer = fallback_response['justification']
-
-                answers.append(answer)
-                logger.info(f"Question {i+1} processed successfully")
-
-            except Exception as e:
-                logger.error(f"Error processing question {i+1}: {e}")
-                answers.append(f"Error processing question: {str(e)}")
+        cache_hits = sum(1 for source in answer_sources if source in ("answer_cache", "semantic_cache"))
+        logger.info(f"Cache hits: {cache_hits}/{len(questions)} ({100 * cache_hits / len(questions):.0f}%) "
+                    f"for this request - answer cache {answer_sources.count('answer_cache')}, "
+                    f"semantic cache {answer_sources.count('semantic_cache')}")
 
         logger.info("All questions processed successfully")
-        return ProcessResponse(answers=answers)
+        return answers
 
     except HTTPException:
         raise
@@ -275,8 +634,75 @@ async def process_documents(
             detail=f"Internal server error: {str(e)}"
         )
     finally:
-        if temp_file_path:
-            cleanup_file(temp_file_path)
+        for temp_path in temp_paths:
+            cleanup_file(temp_path)
+
+async def run_job(job: Job) -> ProcessResponse:
+    return ProcessResponse(answers=await run_pipeline(job.payload, job.update))
+
+job_manager = JobManager(
+    run_job,
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_queued=int(os.getenv("JOB_QUEUE_SIZE", "100")),
+    retention_seconds=float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+)
+
+@app.post("/api/v1/hackrx/run", response_model=ProcessResponse)
+async def process_documents(
+    request: ProcessRequest,
+    token: str = Depends(verify_token)
+):
+    if not request_limiter.try_acquire():
+        logger.warning(f"Rejecting request: {request_limiter.active} already in flight")
+        raise too_many_requests(f"Server busy: {request_limiter.limit} requests already in progress")
+    try:
+        return ProcessResponse(answers=await run_pipeline(request))
+    finally:
+        request_limiter.release()
+
+@app.post("/api/v1/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    request: ProcessRequest,
+    token: str = Depends(verify_token)
+):
+    """Queue a document + questions; poll /api/v1/jobs/{job_id} for progress and the answers"""
+    try:
+        job = job_manager.submit(request)
+    except JobQueueFull as e:
+        raise too_many_requests(f"Job queue is full: {str(e)}")
+    logger.info(f"Queued job {job.id} with {len(request.questions)} questions")
+    return {**job.to_dict(), "queue_position": job_manager.queue_position(job)}
+
+def get_job_or_404(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown or expired job: {job_id}"
+        )
+    return job
+
+@app.get("/api/v1/jobs/{job_id}")
+async def job_status(job_id: str, token: str = Depends(verify_token)):
+    """Status, current stage and progress of a job, with its answers once it has succeeded"""
+    job = get_job_or_404(job_id)
+    content = {**job.to_dict(), "queue_position": job_manager.queue_position(job)}
+    if job.status == SUCCEEDED:
+        content["answers"] = job.result.answers
+    return content
+
+@app.get("/api/v1/jobs/{job_id}/result", response_model=ProcessResponse)
+async def job_result(job_id: str, token: str = Depends(verify_token)):
+    """The answers of a finished job, in the same shape as /api/v1/hackrx/run"""
+    job = get_job_or_404(job_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=job.error_status, detail=job.error)
+    if not job.done:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status} ({job.stage})"
+        )
+    return job.result
 
 if __name__ == "__main__":
     import uvicorn
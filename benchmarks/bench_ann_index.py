@@ -0,0 +1,72 @@
+"""Recall vs. latency of the ANN index types against the exact Flat baseline.
+
+Uses clustered synthetic 384-d vectors (MiniLM-sized) so corpus size can be
+scaled past what a single PDF produces.
+
+Usage:
+    python benchmarks/bench_ann_index.py [--sizes 10000 100000] [--k 10] [--queries 500]
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import faiss
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import INDEX_TYPES, build_index, choose_index_type
+
+
+def synthetic_corpus(n_vectors, dim, n_queries, seed=0):
+    """Gaussian clusters around random centres, roughly like topic-clustered text embeddings"""
+    rng = np.random.default_rng(seed)
+    n_clusters = max(8, n_vectors // 500)
+    centres = rng.standard_normal((n_clusters, dim)).astype("float32")
+    assignments = rng.integers(0, n_clusters, n_vectors + n_queries)
+    data = centres[assignments] + 0.5 * rng.standard_normal((n_vectors + n_queries, dim)).astype("float32")
+    return np.ascontiguousarray(data[:n_vectors]), np.ascontiguousarray(data[n_vectors:])
+
+
+def recall_at_k(found, truth):
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def index_bytes(index):
+    return faiss.serialize_index(index).nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    for n_vectors in args.sizes:
+        vectors, queries = synthetic_corpus(n_vectors, args.dim, args.queries)
+        print(f"\n📊 {n_vectors} vectors, dim={args.dim}, auto policy -> {choose_index_type(n_vectors)}")
+        print(f"{'index':<10}{'build s':>10}{'ms/query':>11}{'recall@k':>11}{'MB':>9}")
+
+        truth = None
+        for index_type in INDEX_TYPES:
+            start = time.perf_counter()
+            index = build_index(vectors, index_type)
+            build_secs = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _, found = index.search(queries, args.k)
+            ms_per_query = (time.perf_counter() - start) * 1000 / len(queries)
+
+            if truth is None:  # INDEX_TYPES starts with the exact baseline
+                truth = found
+            recall = recall_at_k(found, truth)
+            print(f"{index_type:<10}{build_secs:>10.2f}{ms_per_query:>11.3f}{recall:>11.3f}"
+                  f"{index_bytes(index) / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Memory and result-building cost of list-of-dicts chunk metadata vs the columnar ChunkStore.
+
+Usage:
+    python benchmarks/bench_chunk_store.py [--chunks 200000] [--results 100000]
+"""
+import gc
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunk_store import ChunkStore
+
+TEXT_READS = 3
+WORDS = "policy insured hospital claim waiting period cover benefit premium sum limit days".split()
+
+
+def synthetic_chunks(n: int, rng: random.Random) -> list:
+    return [
+        {"text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))),
+         "page": rng.randint(1, 500), "type": rng.choice(["paragraph", "table_row"])}
+        for _ in range(n)
+    ]
+
+
+def measure(build):
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--results", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    # Serialized form, so both layouts are built from scratch while being traced
+    raw = synthetic_chunks(args.chunks, rng)
+    texts = [chunk["text"] for chunk in raw]
+    pages = [chunk["page"] for chunk in raw]
+    types = [chunk["type"] for chunk in raw]
+    del raw
+
+    dicts, dict_bytes = measure(lambda: [
+        {"text": "".join(t), "page": p, "type": ty} for t, p, ty in zip(texts, pages, types)
+    ])
+    store, store_bytes = measure(lambda: ChunkStore.from_chunks(
+        {"text": t, "page": p, "type": ty} for t, p, ty in zip(texts, pages, types)
+    ))
+    text_bytes = sum(len(t.encode("utf-8")) for t in texts)
+    print(f"{args.chunks:,} chunks, {text_bytes / 2**20:.1f} MiB of text\n")
+    print(f"{'layout':<14}{'MiB':>10}{'bytes/chunk overhead':>24}")
+    for name, nbytes in (("list of dicts", dict_bytes), ("ChunkStore", store_bytes)):
+        print(f"{name:<14}{nbytes / 2**20:>10.1f}{(nbytes - text_bytes) / args.chunks:>24.0f}")
+
+    rows = [rng.randrange(args.chunks) for _ in range(args.results)]
+
+    def read_texts(results):
+        # The packer, prompt builder and fallback each read a result's text
+        for result in results:
+            for _ in range(TEXT_READS):
+                result["text"]
+        return results
+
+    timings = {}
+    for name, build in (
+        ("dicts", lambda: [{**dicts[i], "chunk_id": i, "similarity_score": 0.5} for i in rows]),
+        ("views", lambda: [store.result(i, {"similarity_score": 0.5}) for i in rows]),
+        ("bulk views", lambda: store.results(rows, ({"similarity_score": 0.5} for _ in rows))),
+    ):
+        start = time.perf_counter()
+        built = build()
+        built_secs = time.perf_counter() - start
+        read_texts(built)
+        timings[name] = (built[:1000], built_secs, time.perf_counter() - start)
+        del built
+        gc.collect()
+    expected = timings["dicts"][0]
+    assert all(dict(v) == b for name in ("views", "bulk views") for v, b in zip(timings[name][0], expected))
+
+    print(f"\n{args.results:,} results{'':<6}{'build ms':>10}{f'+ {TEXT_READS} text reads ms':>24}")
+    for name, (_, built_secs, total_secs) in timings.items():
+        print(f"{name:<23}{built_secs * 1e3:>10.0f}{total_secs * 1e3:>24.0f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store.save(tmp)
+        start = time.perf_counter()
+        mapped = ChunkStore.load(tmp)
+        first = mapped[0]["text"]
+        print(f"reopening with mmap: {(time.perf_counter() - start) * 1e3:.1f}ms "
+              f"({mapped.nbytes() / 2**20:.1f} MiB mapped, first text {len(first)} chars)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Prompt size of sending every retrieved chunk vs the token-budgeted context packer.
+
+Retrieves the top --k chunks per question from a real document with BM25
+(no embedding model needed, so MMR falls back to shingle similarity), then
+compares the prompt built from all of them with the packed one.
+
+Usage:
+    python benchmarks/bench_context_packer.py [--document Doc5.pdf] [--k 100] [--budget 3000]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunk_store import ChunkStore  # noqa: E402
+from context_packer import ContextPacker, estimate_tokens  # noqa: E402
+from main import extract_file_chunks, build_keyword_index, build_llm_messages, CONTEXT_DIVERSITY  # noqa: E402
+
+QUESTIONS = [
+    "What is the grace period for premium payment?",
+    "What is the waiting period for pre-existing diseases?",
+    "Does this policy cover maternity expenses?",
+    "What is the waiting period for cataract surgery?",
+    "Are the medical expenses for an organ donor covered?",
+    "What is the No Claim Discount offered in this policy?",
+]
+
+
+def prompt_tokens(question, chunks):
+    return sum(estimate_tokens(m["content"]) for m in build_llm_messages(question, chunks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--document", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Doc5.pdf"))
+    parser.add_argument("--k", type=int, default=100)
+    parser.add_argument("--budget", type=int, default=3000)
+    args = parser.parse_args()
+
+    store = ChunkStore.from_chunks(extract_file_chunks(args.document))
+    keyword_index = build_keyword_index(store)
+    packer = ContextPacker(args.budget, CONTEXT_DIVERSITY)
+    print(f"\n📊 {len(store)} chunks, k={args.k}, budget={args.budget} tokens")
+    print(f"{'all chunks':>12}{'packed':>8}{'sent':>7}{'dupes':>7}{'pack ms':>9}  question")
+
+    for question in QUESTIONS:
+        results = [store.result(i, {"bm25_score": score}) for i, score in keyword_index.search(question, args.k)]
+        start = time.perf_counter()
+        packed, stats = packer.pack(results)
+        pack_ms = (time.perf_counter() - start) * 1000
+        print(f"{prompt_tokens(question, results):>12}{prompt_tokens(question, packed):>8}"
+              f"{stats['chunks_sent']:>4}/{stats['chunks_retrieved']:<3}{stats['duplicates_dropped']:>6}"
+              f"{pack_ms:>9.2f}  {question[:50]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compare chunks/sec of the per-chunk encode loop against embed_texts.
+
+Usage:
+    python benchmarks/bench_embedding.py [pdf_path] [--batch-sizes 16 32 64] [--workers 0 4]
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentence_transformers import SentenceTransformer
+from main import extract_meaningful_chunks, embed_texts, EMBEDDING_MODEL_NAME
+
+
+def per_chunk_encode(model, texts):
+    """The original build_improved_faiss_index loop: one encode call per chunk"""
+    return np.array([model.encode(text) for text in texts]).astype("float32")
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf_path", nargs="?", default="Doc5.pdf")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--workers", type=int, nargs="+", default=[0])
+    args = parser.parse_args()
+
+    print(f"📄 Extracting chunks from {args.pdf_path}...")
+    texts = [chunk["text"] for chunk in extract_meaningful_chunks(args.pdf_path)]
+    print(f"✅ {len(texts)} chunks\n")
+
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    model.encode(texts[:8])  # warm up
+
+    baseline, elapsed = timed(per_chunk_encode, model, texts)
+    print(f"{'mode':<28}{'seconds':>10}{'chunks/sec':>14}{'speedup':>10}")
+    print(f"{'per-chunk':<28}{elapsed:>10.2f}{len(texts) / elapsed:>14.1f}{1.0:>10.2f}")
+
+    for workers in args.workers:
+        for batch_size in args.batch_sizes:
+            vectors, batched = timed(embed_texts, model, texts, batch_size=batch_size, workers=workers)
+            assert vectors.shape == baseline.shape and vectors.flags["C_CONTIGUOUS"]
+            label = f"batch={batch_size} workers={workers}"
+            print(f"{label:<28}{batched:>10.2f}{len(texts) / batched:>14.1f}{elapsed / batched:>10.2f}")
+
+    max_diff = float(np.abs(embed_texts(model, texts) - baseline).max())
+    print(f"\nMax abs difference vs per-chunk vectors: {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Speedup curve of parallel page-range PDF extraction over worker counts.
+
+Usage:
+    python benchmarks/bench_extraction.py [pdf_path] [--workers 1 2 4 8] [--repeat 1]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import extract_meaningful_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf_path", nargs="?", default="Doc5.pdf")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"📄 {args.pdf_path} on {os.cpu_count()} CPUs\n")
+    print(f"{'workers':>8}{'seconds':>10}{'speedup':>10}{'chunks':>9}")
+
+    baseline_secs = None
+    baseline_chunks = None
+    for workers in args.workers:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            chunks = extract_meaningful_chunks(args.pdf_path, workers=workers)
+            best = min(best, time.perf_counter() - start)
+
+        if baseline_secs is None:
+            baseline_secs, baseline_chunks = best, chunks
+        elif chunks != baseline_chunks:
+            print(f"⚠ workers={workers} produced different chunks than workers={args.workers[0]}")
+        print(f"{workers:>8}{best:>10.2f}{baseline_secs / best:>10.2f}{len(chunks):>9}")
+
+
+if __name__ == "__main__":
+    main()
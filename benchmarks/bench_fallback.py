@@ -0,0 +1,155 @@
+"""Calls/sec of create_fallback_response before and after the precompiled engine.
+
+This is the path every question takes while the LLM is down. The "before"
+column runs a verbatim copy of the original function, which only looked at
+the best chunk; the current one scores every retrieved chunk, so decisions
+may legitimately differ and are reported side by side.
+
+Usage:
+    python benchmarks/bench_fallback.py [--calls 2000] [--chunks 10]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import create_fallback_response  # noqa: E402
+
+SENTENCES = [
+    "Expenses for cataract surgery are covered up to Rs. 40,000 per eye.",
+    "Cosmetic treatment is not covered under this policy.",
+    "Claims are payable subject to a waiting period of 24 months.",
+    "The insured must notify the company within 30 days of admission.",
+    "Maternity benefit is excluded for the first 2 years.",
+    "Room rent is limited to 1% of the sum insured per day.",
+    "Pre-existing diseases are eligible after 36 months of continuous coverage.",
+    "Any claim not submitted in time may be declined.",
+]
+
+def original_create_fallback_response(parsed_query: Dict, retrieved_chunks: List[Dict]) -> Dict[str, Any]:
+    """create_fallback_response as it was before the precompiled engine (kept for comparison)"""
+    if not retrieved_chunks:
+        return {
+            "decision": "unknown",
+            "amount": "N/A",
+            "justification": "No relevant information found in the provided documents."
+        }
+    
+    # Generic approach - analyze the best matching chunks for any document type
+    best_chunk = retrieved_chunks[0]
+    chunk_text = best_chunk['text'].lower()
+    
+    # Look for positive/approval indicators (generic across domains)
+    positive_indicators = [
+        'approved', 'eligible', 'entitled', 'covered', 'included', 'allowed', 
+        'permitted', 'authorized', 'valid', 'accepted', 'qualified', 'yes',
+        'benefit', 'payable', 'reimbursed', 'compensated', 'supported'
+    ]
+    
+    # Look for negative/rejection indicators
+    negative_indicators = [
+        'rejected', 'denied', 'excluded', 'not eligible', 'not covered', 
+        'not allowed', 'prohibited', 'restricted', 'invalid', 'declined',
+        'not applicable', 'not payable', 'limitation', 'exclude', 'no'
+    ]
+    
+    # Look for conditional indicators (require more information)
+    conditional_indicators = [
+        'subject to', 'provided that', 'if', 'unless', 'condition', 'requirement',
+        'must', 'shall', 'need to', 'dependent on', 'based on'
+    ]
+    
+    # Look for amount/value indicators (monetary or quantitative)
+    amount_indicators = [
+        '₹', '$', 'rupees', 'dollars', 'amount', 'value', 'limit', 'maximum', 
+        'minimum', 'sum', 'total', 'cost', 'fee', 'charge', 'price'
+    ]
+    
+    # Count matches
+    positive_matches = sum(1 for indicator in positive_indicators if indicator in chunk_text)
+    negative_matches = sum(1 for indicator in negative_indicators if indicator in chunk_text)
+    conditional_matches = sum(1 for indicator in conditional_indicators if indicator in chunk_text)
+    
+    # Extract potential amounts/values from the text
+    amount_patterns = [
+        r'₹\s*[\d,]+',  # ₹50,000
+        r'\$\s*[\d,]+',  # $1,000
+        r'rupees?\s+[\d,]+',  # rupees 50000
+        r'rs\.?\s*[\d,]+',  # Rs. 50000
+        r'usd?\s*[\d,]+',  # USD 1000
+        r'amount.?₹\s[\d,]+',  # amount ₹50000
+        r'limit.?₹\s[\d,]+',  # limit ₹50000
+        r'maximum.?₹\s[\d,]+',  # maximum ₹50000
+        r'\d+\s*%',  # 50%
+        r'\d+\s*(days?|months?|years?)',  # 30 days, 6 months
+    ]
+    
+    found_amounts = []
+    for pattern in amount_patterns:
+        matches = re.findall(pattern, chunk_text, re.IGNORECASE)
+        found_amounts.extend(matches)
+    
+    # Decision logic based on indicators (domain-agnostic)
+    if negative_matches > positive_matches and negative_matches > 0:
+        decision = "rejected"
+        amount = "N/A"
+        justification = f"Negative indicators found in document (Page {best_chunk['page']}): {best_chunk['text'][:150]}..."
+    elif positive_matches > 0:
+        decision = "approved"
+        if found_amounts:
+            amount = found_amounts[0]  # Use first found amount/value
+        else:
+            amount = "As per document terms"
+        justification = f"Positive indicators found in document (Page {best_chunk['page']}): {best_chunk['text'][:150]}..."
+    elif conditional_matches > 0:
+        decision = "conditional"
+        amount = "Subject to conditions"
+        justification = f"Conditional terms found - requires verification (Page {best_chunk['page']}): {best_chunk['text'][:150]}..."
+    else:
+        decision = "unknown"
+        amount = "N/A"
+        justification = f"Found related information but decision unclear (Page {best_chunk['page']}): {best_chunk['text'][:150]}..."
+    
+    return {
+        "decision": decision,
+        "amount": amount,
+        "justification": justification
+    }
+
+
+def synthetic_chunks(rng: random.Random, count: int) -> list:
+    return [
+        {"text": " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 12))), "page": rng.randint(1, 50)}
+        for _ in range(count)
+    ]
+
+def run(fallback, workloads):
+    decisions = {}
+    start = time.perf_counter()
+    for chunks in workloads:
+        decision = fallback({}, chunks)["decision"]
+        decisions[decision] = decisions.get(decision, 0) + 1
+    return time.perf_counter() - start, decisions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--chunks", type=int, default=10, help="retrieved chunks per call")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    workloads = [synthetic_chunks(rng, args.chunks) for _ in range(args.calls)]
+
+    print(f"{args.calls} calls x {args.chunks} chunks")
+    for name, fallback in (("before", original_create_fallback_response), ("after", create_fallback_response)):
+        elapsed, decisions = run(fallback, workloads)
+        print(f"  {name:<7}{args.calls / elapsed:>10,.0f} calls/sec ({elapsed / args.calls * 1e6:.0f} µs/call)"
+              f"  decisions: {decisions}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Sequential requests.post answering vs. the concurrent AsyncLLMClient, against the local stub server.
+
+Usage:
+    python benchmarks/bench_llm_client.py [--questions 20] [--latency 0.5] [--concurrency 8]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main as pipeline
+from llm_client import AsyncLLMClient
+from llm_stub_server import create_stub_app, start_stub_server
+
+CHUNKS = [{"text": "The grace period for premium payment is thirty days.", "page": 4, "type": "paragraph"}]
+
+
+async def answer_concurrently(client, questions):
+    return await asyncio.gather(*[client.answer(q, CHUNKS) for q in questions])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    url, server = start_stub_server(create_stub_app(latency=args.latency))
+    questions = [f"What is the grace period? (variant {i})" for i in range(args.questions)]
+
+    # Point the synchronous path at the stub as well
+    pipeline.PPLX_API_URL = url
+    pipeline.PPLX_API_KEY = "stub-key"
+
+    start = time.perf_counter()
+    sequential = [pipeline.get_structured_response(q, {}, CHUNKS) for q in questions]
+    sequential_secs = time.perf_counter() - start
+
+    async def run_async():
+        client = AsyncLLMClient(api_key="stub-key", url=url, max_concurrency=args.concurrency)
+        try:
+            start = time.perf_counter()
+            answers = await answer_concurrently(client, questions)
+            return answers, time.perf_counter() - start
+        finally:
+            await client.aclose()
+
+    concurrent, concurrent_secs = asyncio.run(run_async())
+    server.should_exit = True
+
+    assert sequential == concurrent, "async answers differ from sequential answers"
+    print(f"\n{args.questions} questions, {args.latency}s stub latency")
+    print(f"  {'sequential requests.post':<28}{sequential_secs:6.2f}s")
+    print(f"  {f'AsyncLLMClient (x{args.concurrency})':<28}{concurrent_secs:6.2f}s "
+          f"({sequential_secs / concurrent_secs:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
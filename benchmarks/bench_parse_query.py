@@ -0,0 +1,149 @@
+"""Queries/sec of parse_query before and after the compiled single-pass parser.
+
+The "before" column runs a verbatim copy of the original parse_query; every
+parsed result is also checked to be identical between the two.
+
+Usage:
+    python benchmarks/bench_parse_query.py [--queries 100000] [--seed 0]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from typing import Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import parse_queries, PROCEDURES_ITEMS, LOCATIONS, QUERY_CATEGORIES
+
+
+def original_parse_query(query: str) -> Dict[str, Any]:
+    """parse_query as it was before precompilation (kept for comparison)"""
+    parsed = {
+        "age": None,
+        "gender": None,
+        "procedure_or_item": None,
+        "location": None,
+        "duration_or_period": None,
+        "category": None,
+        "original_query": query
+    }
+    
+    # Age extraction
+    age_match = re.search(r'(\d{1,3})\s*[yY]?\s*[Mm]?', query)
+    if age_match:
+        parsed["age"] = int(age_match.group(1))
+    
+    # Gender extraction
+    if re.search(r'\b(male|M|man|men)\b', query, re.IGNORECASE):
+        parsed["gender"] = "male"
+    elif re.search(r'\b(female|F|woman|women)\b', query, re.IGNORECASE):
+        parsed["gender"] = "female"
+    
+    # Generic procedures/items/services (not just medical)
+    procedures_items = {
+        # Medical
+        "knee": "knee surgery", "cataract": "cataract surgery", "heart": "cardiac procedure",
+        "dental": "dental treatment", "surgery": "surgical procedure",
+        # Legal/Contract
+        "termination": "contract termination", "breach": "contract breach", "renewal": "contract renewal",
+        # HR/Employment
+        "leave": "leave application", "overtime": "overtime work", "promotion": "promotion request",
+        # General
+        "equipment": "equipment", "service": "service", "repair": "repair", "maintenance": "maintenance"
+    }
+    
+    for key, value in procedures_items.items():
+        if key.lower() in query.lower():
+            parsed["procedure_or_item"] = value
+            break
+    
+    # Location extraction (can be expanded for international)
+    locations = ["pune", "mumbai", "delhi", "bangalore", "chennai", "hyderabad", "kolkata", 
+                "ahmedabad", "jaipur", "lucknow", "kanpur", "nagpur", "indore", "bhopal"]
+    for location in locations:
+        if location.lower() in query.lower():
+            parsed["location"] = location.title()
+            break
+    
+    # Duration/Period extraction (more generic)
+    duration_patterns = [
+        (r'(\d+)\s*[-\s]*month', "months"),
+        (r'(\d+)\s*[-\s]*year', "years"),
+        (r'(\d+)\s*[-\s]*day', "days"),
+        (r'(\d+)\s*[-\s]*week', "weeks")
+    ]
+    
+    for pattern, unit in duration_patterns:
+        duration_match = re.search(pattern, query, re.IGNORECASE)
+        if duration_match:
+            parsed["duration_or_period"] = f"{duration_match.group(1)} {unit}"
+            break
+    
+    # Category detection (domain identification)
+    categories = {
+        "insurance": ["insurance", "policy", "claim", "coverage", "premium"],
+        "legal": ["contract", "agreement", "legal", "clause", "terms"],
+        "hr": ["employee", "hr", "leave", "salary", "promotion", "performance"],
+        "medical": ["medical", "health", "treatment", "surgery", "doctor", "hospital"],
+        "financial": ["loan", "credit", "payment", "finance", "bank", "interest"]
+    }
+    
+    for category, keywords in categories.items():
+        if any(keyword.lower() in query.lower() for keyword in keywords):
+            parsed["category"] = category
+            break
+    
+    return parsed
+
+
+FILLER = ["what", "is", "the", "covered", "under", "my", "plan", "for", "a", "claim", "about",
+          "three", "years", "old", "requested", "urgent", "limit", "patient", "office", "wait"]
+
+
+def synthetic_queries(n: int, seed: int):
+    """Random mixes of dictionary keywords, ages, genders, durations and filler words"""
+    rng = random.Random(seed)
+    keywords = list(PROCEDURES_ITEMS) + LOCATIONS + [kw for kws in QUERY_CATEGORIES.values() for kw in kws]
+    queries = []
+    for _ in range(n):
+        words = rng.sample(FILLER, rng.randint(3, 8)) + rng.sample(keywords, rng.randint(0, 4))
+        if rng.random() < 0.5:
+            words.append(f"{rng.randint(18, 80)}{rng.choice(['M', 'F', ' year old', ''])}")
+        if rng.random() < 0.5:
+            words.append(f"{rng.randint(1, 24)}-{rng.choice(['month', 'year', 'day', 'week'])}")
+        if rng.random() < 0.3:
+            words.append(rng.choice(["male", "female", "woman", "man"]))
+        rng.shuffle(words)
+        word = " ".join(words)
+        queries.append(word.capitalize() if rng.random() < 0.5 else word.upper())
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    queries = synthetic_queries(args.queries, args.seed)
+
+    start = time.perf_counter()
+    before = [original_parse_query(q) for q in queries]
+    before_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    after = parse_queries(queries)
+    after_secs = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(before, after) if a != b)
+    print(f"{len(queries)} synthetic queries")
+    print(f"  before: {len(queries) / before_secs:>10,.0f} queries/sec")
+    print(f"  after : {len(queries) / after_secs:>10,.0f} queries/sec ({before_secs / after_secs:.2f}x)")
+    print(f"  mismatched results: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
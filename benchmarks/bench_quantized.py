@@ -0,0 +1,58 @@
+"""Memory and recall of float32 / float16 / int8 vector storage, with and without exact re-ranking.
+
+Recall@k is measured against an exact float32 Flat index. Re-ranking fetches
+k * factor candidates from the quantized index and re-scores them with the
+float32 vectors (memory-mapped in production, so they cost disk, not RAM).
+
+Usage:
+    python benchmarks/bench_quantized.py [--sizes 10000 100000] [--index-types flat hnsw] [--rerank-factor 4]
+"""
+import os
+import sys
+import time
+import argparse
+
+import faiss
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import VECTOR_STORAGE_TYPES, build_index, rerank_exact
+from bench_ann_index import synthetic_corpus, recall_at_k, index_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--index-types", nargs="+", default=["flat", "hnsw"])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    for n_vectors in args.sizes:
+        vectors, queries = synthetic_corpus(n_vectors, args.dim, args.queries)
+        _, truth = build_index(vectors, "flat").search(queries, args.k)
+        print(f"\n📊 {n_vectors} vectors, dim={args.dim}, k={args.k}, rerank factor={args.rerank_factor}")
+        print(f"{'index':<8}{'storage':<10}{'MB':>8}{'recall':>9}{'ms/q':>8}{'rerank recall':>15}{'ms/q':>8}")
+
+        for index_type in args.index_types:
+            for storage in VECTOR_STORAGE_TYPES:
+                index = build_index(vectors, index_type, storage=storage)
+
+                start = time.perf_counter()
+                _, found = index.search(queries, args.k)
+                plain_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+                start = time.perf_counter()
+                _, candidates = index.search(queries, args.k * args.rerank_factor)
+                _, reranked = rerank_exact(queries, candidates, vectors, args.k, faiss.METRIC_L2)
+                rerank_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+                print(f"{index_type:<8}{storage:<10}{index_bytes(index) / 2**20:>8.1f}"
+                      f"{recall_at_k(found, truth):>9.3f}{plain_ms:>8.3f}"
+                      f"{recall_at_k(reranked, truth):>15.3f}{rerank_ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Fixed top-k + threshold filter vs FAISS range search, and similarity threshold calibration.
+
+Synthetic mode (default) times the old retrieval (k=100 neighbours, then a
+Python threshold filter) against a range search capped at k, and counts how
+many hits each one materializes.
+
+Calibration mode embeds a real document and prints percentiles of the
+cosine similarity of each question's top hits, to pick SIMILARITY_THRESHOLD:
+choose a value below the typical rank-1 similarity of questions the document
+answers and above that of off-topic ones.
+
+Usage:
+    python benchmarks/bench_range_search.py [--sizes 10000 100000] [--k 100] [--threshold 0.82]
+    python benchmarks/bench_range_search.py --document Doc5.pdf --questions "What is the grace period?" ...
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import faiss
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import build_index, range_search
+from bench_ann_index import synthetic_corpus
+
+
+def unit(vectors):
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def top_k_then_filter(index, queries, k, threshold):
+    D, I = index.search(queries, k)
+    return [[(int(i), float(s)) for i, s in zip(I[row], D[row]) if i >= 0 and s > threshold]
+            for row in range(len(queries))]
+
+
+def capped_range_search(index, queries, k, threshold):
+    return [[(int(i), float(s)) for i, s in zip(ids, scores)]
+            for ids, scores in range_search(index, queries, threshold, k)]
+
+
+def run_synthetic(args):
+    for n_vectors in args.sizes:
+        vectors, queries = synthetic_corpus(n_vectors, args.dim, args.queries)
+        vectors, queries = unit(vectors), unit(queries)
+        print(f"\n📊 {n_vectors} unit vectors, dim={args.dim}, k={args.k}, threshold={args.threshold}")
+        print(f"{'index':<8}{'method':<14}{'ms/query':>10}{'fetched/q':>11}{'kept/q':>8}")
+        for index_type in args.index_types:
+            index = build_index(vectors, index_type, faiss.METRIC_INNER_PRODUCT)
+            for name, method in (("top-k+filter", top_k_then_filter), ("range", capped_range_search)):
+                start = time.perf_counter()
+                results = method(index, queries, args.k, args.threshold)
+                ms_per_query = (time.perf_counter() - start) * 1000 / len(queries)
+                kept = sum(len(r) for r in results) / len(queries)
+                fetched = args.k if method is top_k_then_filter else kept
+                print(f"{index_type:<8}{name:<14}{ms_per_query:>10.3f}{fetched:>11.1f}{kept:>8.1f}")
+
+
+def run_calibration(args):
+    from main import EMBEDDING_MODEL_NAME, embed_texts, extract_file_chunks
+    from model_registry import get_embedding_model
+
+    model = get_embedding_model(EMBEDDING_MODEL_NAME)
+    chunks = extract_file_chunks(args.document)
+    vectors = embed_texts(model, [chunk["text"] for chunk in chunks])
+    queries = embed_texts(model, args.questions, workers=0)
+    index = build_index(vectors, "flat", faiss.METRIC_INNER_PRODUCT)
+    D, _ = index.search(queries, min(args.k, len(chunks)))
+
+    print(f"\n📊 {len(chunks)} chunks, {len(args.questions)} questions")
+    for question, scores in zip(args.questions, D):
+        print(f"  rank1 {scores[0]:.3f}  rank10 {scores[min(9, len(scores) - 1)]:.3f}  {question[:70]}")
+    ranks = [r for r in (1, 5, 10, 50) if r <= D.shape[1]]
+    print(f"{'rank':>6}{'p10':>8}{'p50':>8}{'p90':>8}")
+    for r in ranks:
+        p10, p50, p90 = np.percentile(D[:, r - 1], [10, 50, 90])
+        print(f"{r:>6}{p10:>8.3f}{p50:>8.3f}{p90:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--index-types", nargs="+", default=["flat", "hnsw"])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=0.82)
+    parser.add_argument("--document", help="PDF/DOCX/email to calibrate the threshold on")
+    parser.add_argument("--questions", nargs="+", default=[])
+    args = parser.parse_args()
+
+    if args.document:
+        run_calibration(args)
+    else:
+        run_synthetic(args)
+
+
+if __name__ == "__main__":
+    main()
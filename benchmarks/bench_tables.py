@@ -0,0 +1,81 @@
+"""Per-page timing of table extraction with and without the ruling-line pre-check.
+
+Each page is opened twice (so neither run benefits from the other's cached
+layout objects): once calling page.extract_tables() unconditionally, once
+running may_contain_table() first and extracting only when it says a table
+is possible. Any page the pre-check skips that does contain tables is flagged.
+
+Usage:
+    python benchmarks/bench_tables.py [pdf_path] [--strategy lines]
+"""
+import os
+import sys
+import time
+import argparse
+
+import pdfplumber
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import may_contain_table, TABLE_SETTINGS
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf_path", nargs="?", default="Doc5.pdf")
+    parser.add_argument("--strategy", default="lines", choices=[s for s in TABLE_SETTINGS if s != "none"])
+    args = parser.parse_args()
+
+    settings = TABLE_SETTINGS[args.strategy]
+    print(f"📄 {args.pdf_path}, strategy={args.strategy}\n")
+    print(f"{'page':>5}{'text ms':>10}{'always ms':>11}{'checked ms':>12}{'tables':>8}  verdict")
+
+    total_text = total_always = total_checked = 0.0
+    skipped = missed = 0
+    with pdfplumber.open(args.pdf_path) as pdf_always, pdfplumber.open(args.pdf_path) as pdf_checked:
+        n_pages = len(pdf_always.pages)
+        for page_idx in range(n_pages):
+            # Text is extracted first in both runs, as read_page does
+            page = pdf_always.pages[page_idx]
+            _, text_secs = timed(page.extract_text)
+            tables, always_secs = timed(page.extract_tables, settings)
+            tables = [t for t in tables if t and len(t) > 1]
+            page.close()
+
+            page = pdf_checked.pages[page_idx]
+            page.extract_text()
+            start = time.perf_counter()
+            possible = may_contain_table(page, args.strategy)
+            if possible:
+                page.extract_tables(settings)
+            checked_secs = time.perf_counter() - start
+            page.close()
+
+            if possible:
+                verdict = "extract"
+            elif tables:
+                verdict = "⚠ MISSED TABLES"
+                missed += 1
+            else:
+                verdict = "skip"
+                skipped += 1
+            total_text += text_secs
+            total_always += always_secs
+            total_checked += checked_secs
+            print(f"{page_idx + 1:>5}{text_secs * 1e3:>10.1f}{always_secs * 1e3:>11.1f}"
+                  f"{checked_secs * 1e3:>12.1f}{len(tables):>8}  {verdict}")
+
+    print(f"\npages: {n_pages}, skipped: {skipped}, missed: {missed}")
+    print(f"text extraction: {total_text:.2f}s")
+    print(f"tables, always extracted: {total_always * 1e3:.1f}ms; with pre-check: {total_checked * 1e3:.1f}ms "
+          f"(saved {(total_always - total_checked) * 1e3:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Local stand-in for the Perplexity chat completions endpoint.
+
+Answers every call after a configurable delay, and can make chosen models
+fail, so the LLM clients can be exercised without network access or API
+credits. Run it standalone or start it in-process with start_stub_server().
+
+Usage:
+    python benchmarks/llm_stub_server.py [--port 8099] [--latency 0.5] [--fail-models sonar]
+"""
+import time
+import socket
+import asyncio
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_stub_app(latency: float = 0.5, fail_models: Optional[List[str]] = None,
+                    latencies: Optional[Dict[str, float]] = None) -> FastAPI:
+    """Stub app; `latencies` overrides `latency` per model name.
+
+    `app.state.calls` lists the model of every call; `app.state.max_in_flight`
+    is the most calls that were being served at once.
+    """
+    app = FastAPI()
+    app.state.calls = []
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+    fail_models = set(fail_models or [])
+    latencies = latencies or {}
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        model_name = payload["model"]
+        app.state.calls.append(model_name)
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        try:
+            await asyncio.sleep(latencies.get(model_name, latency))
+        finally:
+            app.state.in_flight -= 1
+        if model_name in fail_models:
+            return JSONResponse(status_code=503, content={"error": f"{model_name} unavailable"})
+        question = payload["messages"][-1]["content"].rsplit('"', 2)[-2]
+        return {"choices": [{"message": {"content": f"[{model_name}] stub answer to: {question}"}}]}
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub_server(app: FastAPI, port: Optional[int] = None):
+    """Serve `app` on a background thread; returns (url, server) — set server.should_exit to stop"""
+    port = port or free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/chat/completions", server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--fail-models", nargs="*", default=[])
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(args.latency, args.fail_models), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import re
+import hashlib
+from collections import Counter
+from typing import Iterable, List, Set
+
+DEFAULT_BOILERPLATE_PHRASES = [
+    "Bajaj Allianz", "www.bajajallianz.com", "Toll Free",
+    "E-mail", "Reg. No.:", "UIN-", "Page", "GLOBAL HEALTH CARE",
+    "Sl. No.", "LIST I", "LIST II"
+]
+
+DIGITS = re.compile(r"\d+")
+
+
+def compile_boilerplate_pattern(phrases: Iterable[str]) -> re.Pattern:
+    """One regex matching any of the phrases anywhere in a lowercased text.
+
+    Phrases are lowercased here and callers search `text.lower()`: that is several
+    times faster than re.IGNORECASE on an alternation, with the same result.
+    """
+    phrases = sorted({p.lower() for p in phrases if p}, key=len, reverse=True)
+    if not phrases:
+        return re.compile(r"(?!)")  # matches nothing
+    return re.compile("|".join(re.escape(p) for p in phrases))
+
+
+def line_key(line: str) -> int:
+    """Stable 64-bit hash of a line with whitespace collapsed and numbers masked.
+
+    Masking numbers makes "Page 3 of 40" and "Page 4 of 40" the same line.
+    """
+    normalized = DIGITS.sub("#", " ".join(line.lower().split()))
+    return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class RepeatedLineDetector:
+    """Counts on how many pages each (hashed) line occurs to find running headers and footers.
+
+    A line is boilerplate once it appears on at least `min_pages` pages and on at
+    least `min_fraction` of the pages seen so far.
+    """
+
+    def __init__(self, min_pages: int = 3, min_fraction: float = 0.4):
+        self.min_pages = min_pages
+        self.min_fraction = min_fraction
+        self.page_counts: Counter = Counter()
+        self.n_pages = 0
+        self.repeated: Set[int] = set()
+
+    def add_page(self, text: str):
+        keys = {line_key(line) for line in text.splitlines() if line.strip()}
+        self.page_counts.update(keys)
+        self.n_pages += 1
+
+    def freeze(self) -> Set[int]:
+        """Compute the repeated-line set from the pages added so far"""
+        threshold = max(self.min_pages, self.min_fraction * self.n_pages)
+        self.repeated = {key for key, count in self.page_counts.items() if count >= threshold}
+        return self.repeated
+
+    def strip(self, text: str) -> str:
+        """`text` without its repeated lines; blank lines are kept so paragraph breaks survive"""
+        if not self.repeated:
+            return text
+        lines: List[str] = [
+            line for line in text.split("\n")
+            if not line.strip() or line_key(line) not in self.repeated
+        ]
+        return "\n".join(lines)
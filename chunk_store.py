@@ -0,0 +1,225 @@
+import os
+import json
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+TEXTS_FILE = "texts.npy"
+OFFSETS_FILE = "offsets.npy"
+PAGES_FILE = "pages.npy"
+TYPES_FILE = "types.npy"
+DOCUMENTS_FILE = "documents.npy"
+VOCAB_FILE = "vocab.json"
+VECTORS_FILE = "vectors.npy"
+
+NO_DOCUMENT = -1
+
+
+class ChunkView(Mapping):
+    """Read-only dict-like view of one chunk (plus optional result fields such as scores).
+
+    Nothing is copied when the view is created; the text is decoded from the
+    store's arena the first time "text" is read and kept on the view.
+    """
+
+    __slots__ = ("_store", "_row", "_extra", "_text")
+
+    def __init__(self, store: "ChunkStore", row: int, extra: Optional[Dict[str, Any]] = None,
+                 text: Optional[str] = None):
+        self._store = store
+        self._row = row
+        self._extra = extra
+        self._text = text
+
+    def _has_document(self) -> bool:
+        return self._store.document_ids[self._row] != NO_DOCUMENT
+
+    def __getitem__(self, key: str) -> Any:
+        store, row = self._store, self._row
+        if key == "text":
+            if self._text is None:
+                self._text = store.text(row)
+            return self._text
+        if key == "page":
+            return int(store.pages[row])
+        if key == "type":
+            return store.types[store.type_codes[row]]
+        if key in ("document_id", "document") and self._has_document():
+            document_id = int(store.document_ids[row])
+            return document_id if key == "document_id" else store.documents[document_id]
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in ("text", "page", "type"):
+            return True
+        if key in ("document_id", "document"):
+            return self._has_document()
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        yield from ("text", "page", "type")
+        if self._has_document():
+            yield from ("document_id", "document")
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return 3 + 2 * self._has_document() + (len(self._extra) if self._extra is not None else 0)
+
+    def __repr__(self) -> str:
+        return f"ChunkView({dict(self)!r})"
+
+
+class ChunkStore:
+    """Columnar chunk metadata: one UTF-8 text arena with offsets plus NumPy columns.
+
+    Per chunk this costs its text bytes plus 17 bytes (offset, page, type code,
+    document id) instead of a dict and its own str. Saved as .npy files, so a
+    cached store is opened with mmap and only touched pages are read.
+    Indexing returns ChunkView objects; `result()` adds result fields to a view.
+    `vectors` optionally keeps the full-precision embeddings (one row per
+    chunk) for exact re-ranking over a quantized index; loaded with mmap, only
+    the re-ranked rows are read.
+    """
+
+    def __init__(self, arena: np.ndarray, offsets: np.ndarray, pages: np.ndarray, type_codes: np.ndarray,
+                 document_ids: np.ndarray, types: List[str], documents: List[str],
+                 vectors: Optional[np.ndarray] = None):
+        self.arena = arena
+        self.offsets = offsets
+        self.pages = pages
+        self.type_codes = type_codes
+        self.document_ids = document_ids
+        self.types = types
+        self.documents = documents
+        self.vectors = vectors
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Dict[str, Any]]) -> "ChunkStore":
+        builder = ChunkStoreBuilder()
+        builder.extend(chunks)
+        return builder.finish()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> ChunkView:
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return ChunkView(self, int(row))
+
+    def __iter__(self) -> Iterator[ChunkView]:
+        return (ChunkView(self, row) for row in range(len(self)))
+
+    def text(self, row: int) -> str:
+        return self.arena[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+    def texts(self) -> List[str]:
+        return [self.text(row) for row in range(len(self))]
+
+    def result(self, row: int, fields: Dict[str, Any]) -> ChunkView:
+        """View of a chunk carrying its chunk_id and the result fields (scores etc.); `fields` is taken over"""
+        row = int(row)
+        fields["chunk_id"] = row
+        return ChunkView(self, row, fields)
+
+    def results(self, rows: Iterable[int], fields: Iterable[Dict[str, Any]]) -> List[ChunkView]:
+        """result() for many rows at once, with the offsets looked up in bulk and the texts decoded up front"""
+        rows = np.fromiter(rows, dtype="int64")
+        starts = self.offsets[rows].tolist()
+        ends = self.offsets[rows + 1].tolist()
+        arena = memoryview(self.arena)
+        views = []
+        for row, start, end, extra in zip(rows.tolist(), starts, ends, fields):
+            extra["chunk_id"] = row
+            views.append(ChunkView(self, row, extra, str(arena[start:end], "utf-8")))
+        return views
+
+    def document_mask(self, documents: Iterable[int]) -> np.ndarray:
+        """Boolean mask over rows belonging to the given document ids (untagged chunks count as document 0)"""
+        ids = np.where(self.document_ids == NO_DOCUMENT, 0, self.document_ids)
+        return np.isin(ids, np.fromiter(documents, dtype="int32"))
+
+    def document_id(self, row: int) -> int:
+        document_id = int(self.document_ids[row])
+        return 0 if document_id == NO_DOCUMENT else document_id
+
+    def nbytes(self) -> int:
+        """Bytes of metadata columns (the optional re-rank vectors are not counted)"""
+        return sum(a.nbytes for a in (self.arena, self.offsets, self.pages, self.type_codes, self.document_ids))
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, TEXTS_FILE), np.asarray(self.arena))
+        np.save(os.path.join(directory, OFFSETS_FILE), np.asarray(self.offsets))
+        np.save(os.path.join(directory, PAGES_FILE), np.asarray(self.pages))
+        np.save(os.path.join(directory, TYPES_FILE), np.asarray(self.type_codes))
+        np.save(os.path.join(directory, DOCUMENTS_FILE), np.asarray(self.document_ids))
+        if self.vectors is not None:
+            np.save(os.path.join(directory, VECTORS_FILE), np.asarray(self.vectors, dtype="float32"))
+        with open(os.path.join(directory, VOCAB_FILE), "w", encoding="utf-8") as f:
+            json.dump({"types": self.types, "documents": self.documents}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "ChunkStore":
+        with open(os.path.join(directory, VOCAB_FILE), "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+
+        def column(name: str) -> np.ndarray:
+            path = os.path.join(directory, name)
+            try:
+                return np.load(path, mmap_mode="r" if mmap else None)
+            except ValueError:
+                return np.load(path)  # empty arrays can't be mapped
+
+        vectors = column(VECTORS_FILE) if os.path.exists(os.path.join(directory, VECTORS_FILE)) else None
+        return cls(column(TEXTS_FILE), column(OFFSETS_FILE), column(PAGES_FILE), column(TYPES_FILE),
+                   column(DOCUMENTS_FILE), vocab["types"], vocab["documents"], vectors)
+
+
+class ChunkStoreBuilder:
+    """Appends chunks one at a time (e.g. while streaming extraction) and packs them into a ChunkStore"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._offsets = [0]
+        self._pages: List[int] = []
+        self._type_codes: List[int] = []
+        self._document_ids: List[int] = []
+        self._types: Dict[str, int] = {}
+        self._documents: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def add(self, chunk: Dict[str, Any]) -> None:
+        data = chunk["text"].encode("utf-8")
+        self._parts.append(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+        self._pages.append(chunk["page"])
+        self._type_codes.append(self._types.setdefault(chunk["type"], len(self._types)))
+        document_id = chunk.get("document_id", NO_DOCUMENT)
+        if document_id != NO_DOCUMENT:
+            while len(self._documents) <= document_id:
+                self._documents.append("")
+            self._documents[document_id] = chunk["document"]
+        self._document_ids.append(document_id)
+
+    def extend(self, chunks: Iterable[Dict[str, Any]]) -> None:
+        for chunk in chunks:
+            self.add(chunk)
+
+    def finish(self) -> ChunkStore:
+        type_dtype = "uint8" if len(self._types) <= 256 else "uint16"
+        return ChunkStore(
+            np.frombuffer(b"".join(self._parts), dtype="uint8"),
+            np.array(self._offsets, dtype="int64"),
+            np.array(self._pages, dtype="int32"),
+            np.array(self._type_codes, dtype=type_dtype),
+            np.array(self._document_ids, dtype="int32"),
+            list(self._types),
+            self._documents
+        )
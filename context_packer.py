@@ -0,0 +1,112 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+CHARS_PER_TOKEN = 4  # rough average for English text with LLM BPE tokenizers
+CHUNK_HEADER_TOKENS = 12  # "[Document Chunk n - name, Page p]:" plus separators
+SHINGLE_WORDS = 5
+SHINGLE_PRIME = np.uint64(1_000_003)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate; close enough for budgeting without loading the LLM's tokenizer"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def chunk_tokens(chunk: Dict[str, Any]) -> int:
+    return estimate_tokens(chunk["text"]) + CHUNK_HEADER_TOKENS
+
+
+def shingles(text: str, n: int = SHINGLE_WORDS) -> np.ndarray:
+    """Sorted unique 64-bit hashes of a text's word n-grams (one hash of all words when shorter than n)"""
+    words = np.fromiter(map(hash, text.lower().split()), dtype="int64").view("uint64")
+    count = max(1, len(words) - n + 1)
+    grams = np.zeros(count, dtype="uint64")
+    for offset in range(min(n, len(words))):
+        grams = grams * SHINGLE_PRIME + words[offset:offset + count]  # wraps mod 2**64
+    return np.unique(grams)
+
+
+def shared_shingles(shingle_sets: List[np.ndarray]) -> np.ndarray:
+    """Matrix of how many shingles each pair of texts shares (set sizes on the diagonal).
+
+    One matrix product over the shingles that occur in more than one text,
+    instead of a set intersection per pair.
+    """
+    sizes = [len(grams) for grams in shingle_sets]
+    rows = np.repeat(np.arange(len(shingle_sets)), sizes)
+    _, cols, counts = np.unique(np.concatenate(shingle_sets) if shingle_sets else np.empty(0, dtype="uint64"),
+                                return_inverse=True, return_counts=True)
+    repeated = counts[cols] > 1
+    _, shared_cols = np.unique(cols[repeated], return_inverse=True)
+    incidence = np.zeros((len(shingle_sets), int(shared_cols.max(initial=-1)) + 1), dtype="float32")
+    incidence[rows[repeated], shared_cols] = 1
+    shared = incidence @ incidence.T
+    np.fill_diagonal(shared, sizes)
+    return shared
+
+
+class ContextPacker:
+    """Picks which retrieved chunks go into the LLM prompt under a token budget.
+
+    Chunks arrive best first. Duplicates and chunks mostly contained in a
+    better-ranked one (share of the smaller chunk's shingles >=
+    `overlap_threshold`) are dropped, then maximal marginal relevance picks
+    chunks greedily: relevance from the retrieval rank, minus `diversity`
+    times the highest similarity to a chunk already picked. Similarity is the
+    cosine of the chunks' embeddings when given, else the Jaccard index of
+    their shingles. Chunks that no longer fit the budget are skipped, so a
+    smaller later chunk can still fill the gap.
+    """
+
+    def __init__(self, token_budget: int, diversity: float = 0.3, overlap_threshold: float = 0.8):
+        self.token_budget = token_budget
+        self.diversity = diversity
+        self.overlap_threshold = overlap_threshold
+
+    def pack(self, chunks: List[Dict[str, Any]],
+             vectors: Optional[np.ndarray] = None) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """Returns (chunks to send in pick order, stats); `vectors` holds one embedding row per chunk"""
+        costs = np.array([chunk_tokens(chunk) for chunk in chunks], dtype="int64")
+        shared = shared_shingles([shingles(chunk["text"]) for chunk in chunks])
+        sizes = np.maximum(np.diag(shared), 1)
+
+        overlap = shared / np.minimum.outer(sizes, sizes)
+        unique: List[int] = []
+        for i in range(len(chunks)):
+            if not unique or overlap[i, unique].max() < self.overlap_threshold:
+                unique.append(i)
+
+        if vectors is not None:
+            unit = np.asarray(vectors, dtype="float32")[unique]
+            unit = unit / np.maximum(np.linalg.norm(unit, axis=1, keepdims=True), 1e-12)
+            similarity = unit @ unit.T
+        else:
+            kept = shared[np.ix_(unique, unique)]
+            kept_sizes = sizes[unique]
+            similarity = kept / (kept_sizes[:, None] + kept_sizes[None, :] - kept)
+
+        relevance = 1.0 - np.arange(len(unique)) / max(1, len(unique))
+        redundancy = np.zeros(len(unique), dtype="float32")
+        remaining = list(range(len(unique)))
+        picked: List[int] = []
+        used = 0
+        while remaining:
+            scores = relevance[remaining] - self.diversity * redundancy[remaining]
+            best = remaining.pop(int(np.argmax(scores)))
+            if used + costs[unique[best]] > self.token_budget:
+                continue
+            picked.append(unique[best])
+            used += int(costs[unique[best]])
+            redundancy = np.maximum(redundancy, similarity[best])
+
+        total = int(costs.sum())
+        stats = {
+            "chunks_retrieved": len(chunks),
+            "chunks_sent": len(picked),
+            "duplicates_dropped": len(chunks) - len(unique),
+            "context_tokens": used,
+            "tokens_saved": total - used
+        }
+        return [chunks[i] for i in picked], stats
@@ -0,0 +1,82 @@
+import os
+import hashlib
+import tempfile
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MAX_DOWNLOAD_BYTES = int(os.getenv("MAX_DOWNLOAD_MB", "100")) * 1024 * 1024
+DOWNLOAD_TIMEOUT = float(os.getenv("DOWNLOAD_TIMEOUT", "30"))  # connect / per-read seconds
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+
+class DownloadTooLargeError(ValueError):
+    """The document is bigger than the configured download limit"""
+
+
+def _make_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Shared keep-alive connection pool for document downloads
+session = _make_session()
+
+
+def url_suffix(url: str) -> str:
+    """Lower-case file extension of the URL path, ignoring query strings and fragments"""
+    return os.path.splitext(urlparse(url).path)[1].lower()
+
+
+def open_download(url: str, timeout: float = DOWNLOAD_TIMEOUT) -> requests.Response:
+    """Start a streaming GET; the body has not been read yet, so headers can be checked first"""
+    response = session.get(url, stream=True, timeout=timeout)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    return response
+
+
+def save_response(response: requests.Response, suffix: str = "", dest_path: Optional[str] = None,
+                  max_bytes: int = MAX_DOWNLOAD_BYTES) -> Tuple[str, str]:
+    """Stream a response body to disk under a byte limit, hashing it on the way.
+
+    Writes to `dest_path`, or to a new temp file with `suffix`. Returns
+    (path, sha256 hex digest); nothing is left on disk if the limit is hit.
+    """
+    declared = response.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise DownloadTooLargeError(f"Document is {int(declared)} bytes, limit is {max_bytes}")
+
+    if dest_path is None:
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        f = os.fdopen(fd, "wb")
+    else:
+        path = dest_path
+        f = open(path, "wb")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with f:
+            for block in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                size += len(block)
+                if size > max_bytes:
+                    raise DownloadTooLargeError(f"Document exceeds the {max_bytes} byte limit")
+                digest.update(block)
+                f.write(block)
+    except BaseException:
+        if os.path.exists(path):
+            os.unlink(path)
+        raise
+    finally:
+        response.close()
+
+    return path, digest.hexdigest()
@@ -0,0 +1,128 @@
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within one process
+    fcntl = None
+
+VECTORS_FILE = "vectors.f32"
+KEYS_FILE = "keys.txt"
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Canonical form used for cache keys: NFKC with collapsed whitespace"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def chunk_key(text: str, model_name: str) -> str:
+    payload = f"{model_name}\0{normalize_chunk_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Append-only on-disk store of chunk embeddings for one model.
+
+    Vectors live in a raw float32 file read through np.memmap; a sidecar text
+    file maps "<key> <row>" so lookups never load the vectors into memory.
+    Vectors are written before their keys, so a key always points at a
+    complete row, and other processes' appends are picked up on refresh.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, dim: int):
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.dir = os.path.join(os.path.abspath(cache_dir), f"{safe_name}-{dim}")
+        self.model_name = model_name
+        self.dim = dim
+        self._row_bytes = dim * np.dtype("float32").itemsize
+        self._vectors_path = os.path.join(self.dir, VECTORS_FILE)
+        self._keys_path = os.path.join(self.dir, KEYS_FILE)
+        self._rows: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._mmap: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        os.makedirs(self.dir, exist_ok=True)
+        open(self._vectors_path, "ab").close()
+        open(self._keys_path, "ab").close()
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Pick up keys appended since the last read (by this or another process)"""
+        # Binary mode: the offset counts bytes, with no newline translation on Windows
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a concurrent writer is mid-line; read it next time
+                key, row = line.split()
+                self._rows[key.decode("ascii")] = int(row)
+                self._keys_offset += len(line)
+
+        n_rows = os.path.getsize(self._vectors_path) // self._row_bytes
+        if n_rows and (self._mmap is None or self._mmap.shape[0] < n_rows):
+            self._mmap = np.memmap(self._vectors_path, dtype="float32", mode="r", shape=(n_rows, self.dim))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def lookup(self, keys: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """Return (vectors, missing positions); rows for missing keys are left as zeros"""
+        with self._lock:
+            if any(key not in self._rows for key in keys):
+                self._refresh()
+            vectors = np.zeros((len(keys), self.dim), dtype="float32")
+            missing = []
+            for pos, key in enumerate(keys):
+                row = self._rows.get(key)
+                if row is None:
+                    missing.append(pos)
+                else:
+                    vectors[pos] = self._mmap[row]
+        return vectors, missing
+
+    def add(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Append new embeddings; keys already stored are skipped"""
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        with self._lock:
+            new = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self._rows and key not in new:
+                    new[key] = vector
+            if not new:
+                return
+
+            with open(self._vectors_path, "ab") as vf, open(self._keys_path, "ab") as kf:
+                if fcntl is not None:
+                    fcntl.flock(kf, fcntl.LOCK_EX)
+                try:
+                    vf.seek(0, os.SEEK_END)
+                    first_row = vf.tell() // self._row_bytes
+                    vf.truncate(first_row * self._row_bytes)  # drop a torn row from a crashed writer
+                    vf.write(np.stack(list(new.values())).tobytes())
+                    vf.flush()
+                    os.fsync(vf.fileno())
+                    kf.write("".join(f"{key} {first_row + i}\n" for i, key in enumerate(new)).encode("ascii"))
+                    kf.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(kf, fcntl.LOCK_UN)
+            self._refresh()
+
+
+_caches: Dict[Tuple[str, str, int], EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def open_embedding_cache(cache_dir: str, model_name: str, dim: int) -> EmbeddingCache:
+    """Process-wide EmbeddingCache for (cache_dir, model_name, dim)"""
+    with _caches_lock:
+        key = (os.path.abspath(cache_dir), model_name, dim)
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(cache_dir, model_name, dim)
+        return _caches[key]
@@ -0,0 +1,122 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+import faiss
+
+from keyword_index import BM25Index
+from chunk_store import ChunkStore
+
+INDEX_FILE = "index.faiss"
+CHUNKS_DIR = "chunks"
+KEYWORD_FILE = "keywords.npz"
+CACHE_FORMAT = 2  # bump when the entry layout changes so old entries are never read
+
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_cache_key(document_hash: str, config: Dict[str, Any]) -> str:
+    """Cache key from the document content hash plus the extraction/embedding config"""
+    payload = json.dumps({"document": document_hash, "config": config, "format": CACHE_FORMAT}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IndexCache:
+    """Content-addressed on-disk cache of built FAISS indexes and their chunk metadata.
+
+    Each entry is a directory named by its key holding the FAISS index, the
+    columnar chunk store (memory-mapped on load) and (optionally) the BM25
+    keyword index. Entries are written to a temp directory and renamed into
+    place, so readers never see a partial entry. The directory mtime records
+    last use, and the least recently used entries are evicted once the cache
+    grows past `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[Tuple[Any, ChunkStore, Optional[BM25Index]]]:
+        """Return (index, metadatas, keyword_index or None) for `key`, or None on a miss"""
+        entry_dir = self._entry_dir(key)
+        try:
+            index = faiss.read_index(os.path.join(entry_dir, INDEX_FILE))
+            metadatas = ChunkStore.load(os.path.join(entry_dir, CHUNKS_DIR))
+            keyword_path = os.path.join(entry_dir, KEYWORD_FILE)
+            keyword_index = BM25Index.load(keyword_path) if os.path.exists(keyword_path) else None
+            os.utime(entry_dir)  # mark as recently used
+        except (OSError, RuntimeError, ValueError, KeyError):
+            # Missing, partially evicted or corrupt entries are all misses
+            return None
+        return index, metadatas, keyword_index
+
+    def put(self, key: str, index, metadatas: ChunkStore,
+            keyword_index: Optional[BM25Index] = None) -> None:
+        """Store an index and its metadata under `key`, then evict down to the size bound"""
+        entry_dir = self._entry_dir(key)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+        try:
+            faiss.write_index(index, os.path.join(tmp_dir, INDEX_FILE))
+            metadatas.save(os.path.join(tmp_dir, CHUNKS_DIR))
+            if keyword_index is not None:
+                keyword_index.save(os.path.join(tmp_dir, KEYWORD_FILE))
+            try:
+                os.rename(tmp_dir, entry_dir)
+            except OSError:
+                # Another worker stored the same key first; its entry is equivalent
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(".tmp-") or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(root, name))
+                    for root, _, names in os.walk(path) for name in names
+                )
+                entries.append((os.stat(path).st_mtime, size, path))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in `max_bytes`"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,168 @@
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    """One submitted unit of work, its current stage and progress, and its outcome"""
+
+    def __init__(self, payload: Any):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress: Dict[str, Any] = {}
+        self.stage_started: Dict[str, float] = {}
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.error_status: Optional[int] = None
+
+    def update(self, stage: str, **progress) -> None:
+        """Record the current stage; progress fields are replaced whenever the stage changes"""
+        if stage != self.stage:
+            self.stage = stage
+            self.progress = {}
+            self.stage_started[stage] = time.time()
+        self.progress.update(progress)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = self.finished_at or time.time()
+        stages = list(self.stage_started.items())
+        # Seconds spent in each stage, in the order they were entered
+        durations = {
+            stage: round((stages[i + 1][1] if i + 1 < len(stages) else now) - started, 3)
+            for i, (stage, started) in enumerate(stages)
+        }
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "stage_seconds": durations,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+
+class JobManager:
+    """Bounded queue of jobs processed by a fixed pool of asyncio workers.
+
+    `handler(job)` does the work, reporting progress through `job.update()`,
+    and its return value becomes `job.result`. At most `max_queued` jobs wait
+    at once (submit raises JobQueueFull beyond that); finished jobs are kept
+    for `retention_seconds` so clients can collect their results.
+    """
+
+    def __init__(self, handler: Callable[[Job], Awaitable[Any]], workers: int = 2,
+                 max_queued: int = 100, retention_seconds: float = 3600.0):
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self.counters = {"submitted": 0, "succeeded": 0, "failed": 0, "rejected": 0}
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, payload: Any) -> Job:
+        self._prune()
+        job = Job(payload)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise JobQueueFull(f"{self.max_queued} jobs already queued")
+        self.jobs[job.id] = job
+        self.counters["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def queue_position(self, job: Job) -> Optional[int]:
+        """1-based position among queued jobs (None once the job has started)"""
+        if job.status != QUEUED:
+            return None
+        position = 0
+        for other in self.jobs.values():
+            if other.status == QUEUED:
+                position += 1
+            if other is job:
+                return position
+        return None
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self.jobs.items() if job.done and job.finished_at < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            job = await self.queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.update("starting")
+            logger.info(f"Job worker {n} started job {job.id}")
+            try:
+                job.result = await self.handler(job)
+                job.status = SUCCEEDED
+                self.counters["succeeded"] += 1
+            except asyncio.CancelledError:
+                job.status, job.error, job.error_status = FAILED, "Server shutting down", 503
+                raise
+            except Exception as e:
+                # HTTPException-style errors keep their status code and message
+                job.error_status = getattr(e, "status_code", 500)
+                job.error = str(getattr(e, "detail", e))
+                job.status = FAILED
+                self.counters["failed"] += 1
+                logger.error(f"Job {job.id} failed: {job.error}")
+            finally:
+                job.finished_at = time.time()
+                job.stage = job.status  # last progress is kept
+                self.queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        running = sum(1 for job in self.jobs.values() if job.status == RUNNING)
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "max_queued": self.max_queued,
+            "running": running,
+            "tracked_jobs": len(self.jobs),
+            **self.counters
+        }
@@ -0,0 +1,110 @@
+import re
+import json
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in is it its of on or that the this to was were what
+when where which who will with does do under any there their been can if not no
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [tok for tok in TOKEN_PATTERN.findall(text.lower()) if len(tok) > 1 and tok not in STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index with precomputed Okapi BM25 weights.
+
+    Postings are stored CSR-style (indptr / doc_ids / weights per term), so a
+    query only touches the postings of its own terms; its cost depends on how
+    common those terms are, not on the number of chunks.
+    """
+
+    def __init__(self, vocab: Dict[str, int], indptr: np.ndarray, doc_ids: np.ndarray,
+                 weights: np.ndarray, n_docs: int):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = n_docs
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lens = np.zeros(len(texts), dtype="float32")
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lens[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        avgdl = float(doc_lens.mean()) if len(texts) and doc_lens.mean() > 0 else 1.0
+        vocab = {}
+        indptr = [0]
+        all_ids, all_weights = [], []
+        for term_id, (term, plist) in enumerate(sorted(postings.items())):
+            vocab[term] = term_id
+            ids = np.fromiter((doc_id for doc_id, _ in plist), dtype="int32", count=len(plist))
+            tfs = np.fromiter((tf for _, tf in plist), dtype="float32", count=len(plist))
+            idf = np.log(1.0 + (len(texts) - len(plist) + 0.5) / (len(plist) + 0.5))
+            norm = k1 * (1.0 - b + b * doc_lens[ids] / avgdl)
+            all_ids.append(ids)
+            all_weights.append((idf * tfs * (k1 + 1.0) / (tfs + norm)).astype("float32"))
+            indptr.append(indptr[-1] + len(plist))
+
+        return cls(
+            vocab,
+            np.array(indptr, dtype="int64"),
+            np.concatenate(all_ids) if all_ids else np.empty(0, dtype="int32"),
+            np.concatenate(all_weights) if all_weights else np.empty(0, dtype="float32"),
+            len(texts)
+        )
+
+    def search(self, query: str, k: int = 10, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (doc_id, bm25 score) pairs for a query, best first; `allowed` is an optional boolean mask over doc ids"""
+        term_ids = [self.vocab[term] for term in tokenize(query) if term in self.vocab]
+        if not term_ids:
+            return []
+
+        # Gather only the postings of the query terms and sum scores per document
+        ids = np.concatenate([self.doc_ids[self.indptr[t]:self.indptr[t + 1]] for t in term_ids])
+        weights = np.concatenate([self.weights[self.indptr[t]:self.indptr[t + 1]] for t in term_ids])
+        docs, inverse = np.unique(ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        if allowed is not None:
+            keep = allowed[docs]
+            docs, scores = docs[keep], scores[keep]
+
+        if len(docs) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(docs))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(docs[i]), float(scores[i])) for i in top]
+
+    def search_batch(self, queries: List[str], k: int = 10,
+                     allowed: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        return [self.search(query, k, allowed) for query in queries]
+
+    def save(self, path: str) -> None:
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                terms=np.frombuffer(json.dumps(terms).encode("utf-8"), dtype="uint8"),
+                indptr=self.indptr, doc_ids=self.doc_ids, weights=self.weights,
+                n_docs=np.array([self.n_docs])
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as data:
+            terms = json.loads(data["terms"].tobytes().decode("utf-8"))
+            return cls(
+                {term: term_id for term_id, term in enumerate(terms)},
+                data["indptr"], data["doc_ids"], data["weights"], int(data["n_docs"][0])
+            )
@@ -0,0 +1,157 @@
+import time
+import asyncio
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+import httpx
+
+from main import (
+    PPLX_API_KEY,
+    PPLX_API_URL,
+    LLM_TIMEOUT,
+    LLM_MAX_CONCURRENCY,
+    LLM_BREAKER_FAILURES,
+    LLM_BREAKER_RESET_SECONDS,
+    LLM_HEDGE_PERCENTILE,
+    MODELS_TO_TRY,
+    NO_ANSWER,
+    build_llm_messages,
+    build_llm_payload
+)
+from model_router import ModelRouter
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLLMClient:
+    """Async Perplexity chat client with a pooled keep-alive connection.
+
+    `max_concurrency` bounds in-flight calls across everything sharing the
+    client, and each model call gets its own timeout so one slow model can't
+    stall the event loop or the rest of a request. Model order, circuit
+    breaking and hedging are delegated to a ModelRouter.
+    """
+
+    def __init__(self, api_key: Optional[str] = PPLX_API_KEY, url: str = PPLX_API_URL,
+                 timeout: float = LLM_TIMEOUT, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 models: Optional[List[str]] = None, router: Optional[ModelRouter] = None):
+        self.api_key = api_key
+        self.url = url
+        self.models = models or list(MODELS_TO_TRY)
+        self.router = router or ModelRouter(
+            self.models,
+            failure_threshold=LLM_BREAKER_FAILURES,
+            reset_timeout=LLM_BREAKER_RESET_SECONDS,
+            hedge_percentile=LLM_HEDGE_PERCENTILE
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency
+            ),
+            headers={"Content-Type": "application/json"}
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def complete(self, model_name: str, messages: List[Dict[str, str]]) -> str:
+        """One chat completion call; raises on HTTP or transport errors"""
+        async with self._semaphore:
+            response = await self._client.post(
+                self.url,
+                json=build_llm_payload(model_name, messages),
+                headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"].strip()
+
+    async def _routed_call(self, model_name: str, messages: List[Dict[str, str]]) -> str:
+        """complete() with its outcome and latency recorded on the router"""
+        self.router.record_call(model_name)
+        start = time.monotonic()
+        try:
+            answer = await self.complete(model_name, messages)
+        except asyncio.CancelledError:
+            self.router.record_cancelled(model_name)  # e.g. a hedge that lost the race
+            raise
+        except Exception:
+            self.router.record_failure(model_name)
+            raise
+        self.router.record_success(model_name, time.monotonic() - start)
+        return answer
+
+    async def _hedged_call(self, primary: str, backup: Optional[str],
+                           messages: List[Dict[str, str]], attempted: set) -> Tuple[str, str]:
+        """Call `primary`; if it runs past its hedge delay, race a request to `backup`.
+
+        Returns (model that answered, answer).
+        """
+        attempted.add(primary)
+        first = asyncio.ensure_future(self._routed_call(primary, messages))
+        delay = self.router.hedge_delay(primary) if backup else None
+        if delay is None:
+            return primary, await first
+
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return primary, first.result()
+
+        logger.info(f"Model '{primary}' slower than {delay * 1000:.0f}ms, hedging with '{backup}'")
+        attempted.add(backup)
+        second = asyncio.ensure_future(self._routed_call(backup, messages))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.router.record_hedge(primary, won=task is second)
+                        return (backup if task is second else primary), task.result()
+                    error = task.exception()
+            self.router.record_hedge(primary, won=False)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @property
+    def chain_name(self) -> str:
+        """Identifies the configured model chain (e.g. for answer cache keys)"""
+        return ",".join(self.models)
+
+    async def answer(self, query: str, retrieved_chunks: List[Dict[str, Any]]) -> str:
+        """Async counterpart of main.get_structured_response: try healthy models in preference order"""
+        _, answer = await self.answer_with_model(query, retrieved_chunks)
+        return answer
+
+    async def answer_with_model(self, query: str,
+                                retrieved_chunks: List[Dict[str, Any]]) -> Tuple[Optional[str], str]:
+        """Like answer(), but also returns the model that answered (None for fallback answers)"""
+        if not retrieved_chunks:
+            return None, NO_ANSWER
+        if not self.api_key:
+            logger.warning("No API key found, using fallback response")
+            return None, NO_ANSWER
+
+        messages = build_llm_messages(query, retrieved_chunks)
+        candidates = self.router.candidates()
+        attempted = set()
+        for position, model_name in enumerate(candidates):
+            if model_name in attempted:
+                continue  # already raced as a hedge and failed
+            backup = next((m for m in candidates[position + 1:] if m not in attempted), None)
+            try:
+                winner, answer = await self._hedged_call(model_name, backup, messages, attempted)
+                logger.info(f"Model '{winner}' succeeded")
+                return winner, answer
+            except httpx.HTTPStatusError as e:
+                logger.warning(f"API Error {e.response.status_code} from {model_name}: {e.response.text[:200]}")
+            except (httpx.HTTPError, KeyError, IndexError, ValueError) as e:
+                logger.warning(f"Error with model {model_name}: {e!r}")
+
+        logger.warning("All models failed, returning fallback answer.")
+        return None, NO_ANSWER
@@ -2,59 +2,231 @@ import os
 import sys
 import re
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from urllib.parse import urlparse
 import pdfplumber
 import numpy as np
 import faiss
 # import pickle
 import requests
-from tqdm import tqdm
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-from typing import Dict, List, Any
+from model_registry import get_embedding_model
+from embedding_cache import open_embedding_cache, chunk_key
+from ann_index import build_index, IncrementalIndexBuilder, filtered_search_params, range_search, rerank_exact
+from keyword_index import BM25Index
+from chunk_store import ChunkStore, ChunkStoreBuilder
+from downloader import open_download, save_response
+from multi_pattern import MultiPatternMatcher
+from context_packer import ContextPacker
+from boilerplate import DEFAULT_BOILERPLATE_PHRASES, compile_boilerplate_pattern, RepeatedLineDetector
+from typing import Dict, List, Any, Iterable, Iterator, Optional
 from docx import Document
 
 # === CONFIG ===
 load_dotenv()
 PPLX_API_KEY = os.getenv("PPLX_API_KEY")
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "0"))  # 0/1 = encode in-process
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".embedding_cache")  # empty = disabled
+INDEX_TYPE = os.getenv("INDEX_TYPE", "auto")  # auto, flat, ivf_flat, ivf_pq, hnsw
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "float32")  # float32, float16 or int8 (scalar-quantized)
+RERANK_FACTOR = int(os.getenv("RERANK_FACTOR", "0"))  # >0: fetch k * factor candidates, re-rank with float32
+# Minimum cosine similarity of a semantic hit; 0.25 is the old squared-L2 < 1.5 cut on unit vectors
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.25"))
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "0"))  # 0/1 = extract pages serially
+EXTRACT_MIN_PAGES_PER_WORKER = 4
+CHUNKS_PER_PAGE_ESTIMATE = 8  # for sizing streamed indexes before extraction finishes
+RRF_K = 60  # reciprocal-rank fusion constant
+# Paragraphs containing any of these phrases are dropped; "|"-separated, case-insensitive
+BOILERPLATE_PHRASES = [
+    p.strip() for p in os.getenv("BOILERPLATE_PHRASES", "|".join(DEFAULT_BOILERPLATE_PHRASES)).split("|") if p.strip()
+]
+BOILERPLATE_PATTERN = compile_boilerplate_pattern(BOILERPLATE_PHRASES)
+REPEATED_LINE_SAMPLE_PAGES = int(os.getenv("REPEATED_LINE_SAMPLE_PAGES", "20"))  # 0 = keep repeated lines
+REPEATED_LINE_MIN_PAGES = 3
+REPEATED_LINE_MIN_FRACTION = 0.4
+TABLE_STRATEGY = os.getenv("TABLE_STRATEGY", "lines")  # lines, lines_strict, text, none
+TABLE_SETTINGS = {
+    "lines": {"vertical_strategy": "lines", "horizontal_strategy": "lines"},
+    "lines_strict": {"vertical_strategy": "lines_strict", "horizontal_strategy": "lines_strict"},
+    "text": {"vertical_strategy": "text", "horizontal_strategy": "text"},
+    "none": None
+}
+TABLE_EDGE_TOLERANCE = 6.0
+
+def index_config() -> Dict[str, Any]:
+    """Settings that change the chunks or vectors built for a document (part of index cache keys)"""
+    return {
+        "extractor": "meaningful_chunks_v2",
+        "boilerplate": BOILERPLATE_PHRASES,
+        "repeated_line_sample_pages": REPEATED_LINE_SAMPLE_PAGES,
+        "tables": TABLE_STRATEGY,
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "index": INDEX_TYPE,
+        "metric": "cosine",
+        "storage": VECTOR_STORAGE,
+        "rerank": RERANK_FACTOR > 0  # cached chunk stores only carry float32 vectors when enabled
+    }
+
+# LLM settings
+PPLX_API_URL = os.getenv("PPLX_API_URL", "https://api.perplexity.ai/chat/completions")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))  # seconds per model call
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # in-flight calls per API worker
+MODELS_TO_TRY = [
+    "sonar",
+    "sonar-pro",
+    "llama-3.1-sonar-small-128k-online",
+    "llama-3.1-sonar-large-128k-online"
+]
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))  # consecutive failures that open a model's circuit
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))  # 0 = never hedge
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))  # estimated prompt tokens for chunks
+CONTEXT_DIVERSITY = float(os.getenv("CONTEXT_DIVERSITY", "0.3"))  # MMR redundancy penalty; 0 = rank order
+NO_ANSWER = "I couldn't find relevant information in the provided document excerpts."
 
 # === STEP 1: IMPROVED TEXT EXTRACTION ===
 
-def extract_meaningful_chunks(pdf_path: str) -> List[Dict[str, Any]]:
-    """Extract meaningful chunks from PDF instead of fragmented table cells"""
-    chunks = []
+def may_contain_table(page, strategy: str = TABLE_STRATEGY) -> bool:
+    """Cheap check on the page's ruling lines and rects; False only when no ruled table can be found
+
+    A table with a header and at least one row needs 3 horizontal edges that each
+    cross 2 vertical edges (a page border plus a rule under the header doesn't
+    qualify). Text-aligned tables ("text" strategy) can't be ruled out.
+    """
+    if strategy == "none":
+        return False
+    if strategy not in ("lines", "lines_strict"):
+        return True
+    edges = [e for e in page.edges if strategy == "lines" or e["object_type"] == "line"]
+    h = np.array([(e["x0"], e["x1"], e["top"]) for e in edges if e["orientation"] == "h"]).reshape(-1, 3)
+    v = np.array([(e["x0"], e["top"], e["bottom"]) for e in edges if e["orientation"] == "v"]).reshape(-1, 3)
+    if len(h) < 3 or len(v) < 2:
+        return False
+    # Generous slack: pdfplumber snaps/joins edges and tests intersections within 3pt each
+    tol = TABLE_EDGE_TOLERANCE
+    crosses = (
+        (v[None, :, 0] >= h[:, None, 0] - tol) & (v[None, :, 0] <= h[:, None, 1] + tol)
+        & (h[:, None, 2] >= v[None, :, 1] - tol) & (h[:, None, 2] <= v[None, :, 2] + tol)
+    )
+    return int((crosses.sum(axis=1) >= 2).sum()) >= 3
+
+def read_page(page, page_num: int, table_strategy: str = TABLE_STRATEGY) -> tuple:
+    """Raw text and table chunks of a single pdfplumber page"""
+    text = page.extract_text() or ""
     
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, 1):
-            text = page.extract_text() or ""
-            
-            # Extract paragraph-level chunks
-            paragraphs = text.split('\n\n')
-            for para in paragraphs:
-                clean_para = ' '.join(para.split())  # Clean whitespace
-                if len(clean_para) > 50 and not is_header_or_footer(clean_para):
-                    chunks.append({
-                        "text": clean_para,
-                        "page": page_num,
-                        "type": "paragraph"
-                    })
-            
-            # Extract table content more meaningfully
-            tables = page.extract_tables()
-            for table in tables:
-                if table and len(table) > 1:
-                    table_content = extract_table_content(table, page_num)
-                    chunks.extend(table_content)
+    # Extract table content more meaningfully
+    table_chunks = []
+    tables = page.extract_tables(TABLE_SETTINGS[table_strategy]) if may_contain_table(page, table_strategy) else []
+    for table in tables:
+        if table and len(table) > 1:
+            table_chunks.extend(extract_table_content(table, page_num))
     
+    return text, table_chunks
+
+def chunk_page_text(text: str, page_num: int) -> List[Dict[str, Any]]:
+    """Paragraph-level chunks of a page's text"""
+    chunks = []
+    paragraphs = text.split('\n\n')
+    for para in paragraphs:
+        clean_para = ' '.join(para.split())  # Clean whitespace
+        if len(clean_para) > 50 and not is_header_or_footer(clean_para):
+            chunks.append({
+                "text": clean_para,
+                "page": page_num,
+                "type": "paragraph"
+            })
     return chunks
 
+def extract_page_range(pdf_path: str, start: int, end: int) -> List[tuple]:
+    """(page_num, text, table_chunks) for pages [start, end) (0-based); opens its own PDF handle so it can run in a worker"""
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_idx in range(start, end):
+            page = pdf.pages[page_idx]
+            pages.append((page_idx + 1, *read_page(page, page_idx + 1)))
+            page.close()  # release cached layout objects as we go
+    return pages
+
+def estimate_pdf_chunks(pdf_path: str) -> int:
+    """Rough chunk count of a PDF from its page count, known before any page is extracted"""
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages) * CHUNKS_PER_PAGE_ESTIMATE
+
+def split_page_ranges(n_pages: int, n_ranges: int) -> List[tuple]:
+    """Split n_pages into up to n_ranges contiguous, near-equal (start, end) ranges"""
+    n_ranges = max(1, min(n_ranges, n_pages))
+    bounds = [round(i * n_pages / n_ranges) for i in range(n_ranges + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(n_ranges) if bounds[i] < bounds[i + 1]]
+
+def iter_page_contents(pdf_path: str, workers: int = EXTRACT_WORKERS, executor=None) -> Iterator[tuple]:
+    """Yield (page_num, text, table_chunks) in page order, page by page (or range by range with workers)
+
+    Pass a long-lived process `executor` (with `workers` processes) to reuse it
+    across documents instead of starting a pool per call.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        n_pages = len(pdf.pages)
+        if workers <= 1 or n_pages < EXTRACT_MIN_PAGES_PER_WORKER * 2:
+            for page_idx in range(n_pages):
+                page = pdf.pages[page_idx]
+                yield (page_idx + 1, *read_page(page, page_idx + 1))
+                page.close()  # release cached layout objects as we go
+            return
+    
+    # Several ranges per worker so one slow (table-heavy) range doesn't leave the others idle
+    n_workers = min(workers, n_pages // EXTRACT_MIN_PAGES_PER_WORKER)
+    ranges = iter(split_page_ranges(n_pages, n_workers * 4))
+    
+    def results(pool):
+        # At most 2 ranges per worker in flight, so finished ranges don't pile up ahead of the consumer
+        window = deque(pool.submit(extract_page_range, pdf_path, start, end)
+                       for start, end in islice(ranges, 2 * n_workers))
+        try:
+            while window:
+                pages = window.popleft().result()  # in page order
+                next_range = next(ranges, None)
+                if next_range is not None:
+                    window.append(pool.submit(extract_page_range, pdf_path, *next_range))
+                yield from pages
+        finally:
+            for future in window:
+                future.cancel()
+    
+    if executor is not None:
+        yield from results(executor)
+        return
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        yield from results(pool)
+
+def iter_meaningful_chunks(pdf_path: str, workers: int = EXTRACT_WORKERS,
+                           sample_pages: int = REPEATED_LINE_SAMPLE_PAGES, executor=None) -> Iterator[Dict[str, Any]]:
+    """Yield meaningful chunks from a PDF in page order, minus lines repeated across pages
+
+    The first `sample_pages` pages are buffered to learn the document's running
+    headers/footers; after that pages stream straight through.
+    """
+    pages = iter_page_contents(pdf_path, workers, executor)
+    detector = RepeatedLineDetector(REPEATED_LINE_MIN_PAGES, REPEATED_LINE_MIN_FRACTION)
+    sample = list(islice(pages, sample_pages)) if sample_pages > 0 else []
+    for _, text, _ in sample:
+        detector.add_page(text)
+    detector.freeze()
+    
+    for page_num, text, table_chunks in chain(sample, pages):
+        yield from chunk_page_text(detector.strip(text), page_num)
+        yield from table_chunks
+
+def extract_meaningful_chunks(pdf_path: str, workers: int = EXTRACT_WORKERS) -> List[Dict[str, Any]]:
+    """Extract meaningful chunks from PDF instead of fragmented table cells"""
+    return list(iter_meaningful_chunks(pdf_path, workers))
+
 def is_header_or_footer(text: str) -> bool:
     """Filter out headers, footers, and noise"""
-    unwanted_patterns = [
-        "Bajaj Allianz", "www.bajajallianz.com", "Toll Free",
-        "E-mail", "Reg. No.:", "UIN-", "Page", "GLOBAL HEALTH CARE",
-        "Sl. No.", "LIST I", "LIST II"
-    ]
-    return any(pattern.lower() in text.lower() for pattern in unwanted_patterns)
+    return BOILERPLATE_PATTERN.search(text.lower()) is not None
 
 def extract_table_content(table: List[List[str]], page_num: int) -> List[Dict[str, Any]]:
     """Extract meaningful content from tables"""
@@ -263,6 +435,47 @@ def process_attachment(file_path: str) -> List[Dict[str, Any]]:
 
 # === STEP 2: QUERY PARSING ===
 
+# Generic procedures/items/services (not just medical); earlier entries win
+PROCEDURES_ITEMS = {
+    # Medical
+    "knee": "knee surgery", "cataract": "cataract surgery", "heart": "cardiac procedure",
+    "dental": "dental treatment", "surgery": "surgical procedure",
+    # Legal/Contract
+    "termination": "contract termination", "breach": "contract breach", "renewal": "contract renewal",
+    # HR/Employment
+    "leave": "leave application", "overtime": "overtime work", "promotion": "promotion request",
+    # General
+    "equipment": "equipment", "service": "service", "repair": "repair", "maintenance": "maintenance"
+}
+
+# Location extraction (can be expanded for international)
+LOCATIONS = ["pune", "mumbai", "delhi", "bangalore", "chennai", "hyderabad", "kolkata", 
+             "ahmedabad", "jaipur", "lucknow", "kanpur", "nagpur", "indore", "bhopal"]
+
+# Category detection (domain identification); earlier categories win
+QUERY_CATEGORIES = {
+    "insurance": ["insurance", "policy", "claim", "coverage", "premium"],
+    "legal": ["contract", "agreement", "legal", "clause", "terms"],
+    "hr": ["employee", "hr", "leave", "salary", "promotion", "performance"],
+    "medical": ["medical", "health", "treatment", "surgery", "doctor", "hospital"],
+    "financial": ["loan", "credit", "payment", "finance", "bank", "interest"]
+}
+
+AGE_PATTERN = re.compile(r'(\d{1,3})\s*[yY]?\s*[Mm]?')
+MALE_PATTERN = re.compile(r'\b(male|M|man|men)\b', re.IGNORECASE)
+FEMALE_PATTERN = re.compile(r'\b(female|F|woman|women)\b', re.IGNORECASE)
+DURATION_PATTERNS = [
+    (re.compile(r'(\d+)\s*[-\s]*month', re.IGNORECASE), "months"),
+    (re.compile(r'(\d+)\s*[-\s]*year', re.IGNORECASE), "years"),
+    (re.compile(r'(\d+)\s*[-\s]*day', re.IGNORECASE), "days"),
+    (re.compile(r'(\d+)\s*[-\s]*week', re.IGNORECASE), "weeks")
+]
+
+# One matcher for every dictionary keyword, so a query is scanned once
+QUERY_KEYWORDS = MultiPatternMatcher(
+    list(PROCEDURES_ITEMS) + LOCATIONS + [kw for kws in QUERY_CATEGORIES.values() for kw in kws]
+)
+
 def parse_query(query: str) -> Dict[str, Any]:
     """Extract structured information from natural language query - generic for any domain"""
     parsed = {
@@ -276,211 +489,423 @@ def parse_query(query: str) -> Dict[str, Any]:
     }
     
     # Age extraction
-    age_match = re.search(r'(\d{1,3})\s*[yY]?\s*[Mm]?', query)
+    age_match = AGE_PATTERN.search(query)
     if age_match:
         parsed["age"] = int(age_match.group(1))
     
     # Gender extraction
-    if re.search(r'\b(male|M|man|men)\b', query, re.IGNORECASE):
+    if MALE_PATTERN.search(query):
         parsed["gender"] = "male"
-    elif re.search(r'\b(female|F|woman|women)\b', query, re.IGNORECASE):
+    elif FEMALE_PATTERN.search(query):
         parsed["gender"] = "female"
     
-    # Generic procedures/items/services (not just medical)
-    procedures_items = {
-        # Medical
-        "knee": "knee surgery", "cataract": "cataract surgery", "heart": "cardiac procedure",
-        "dental": "dental treatment", "surgery": "surgical procedure",
-        # Legal/Contract
-        "termination": "contract termination", "breach": "contract breach", "renewal": "contract renewal",
-        # HR/Employment
-        "leave": "leave application", "overtime": "overtime work", "promotion": "promotion request",
-        # General
-        "equipment": "equipment", "service": "service", "repair": "repair", "maintenance": "maintenance"
-    }
+    found = QUERY_KEYWORDS.find_all(query)  # the matcher lowercases the query itself
     
-    for key, value in procedures_items.items():
-        if key.lower() in query.lower():
+    # Dictionary order decides between several matches, as before
+    for key, value in PROCEDURES_ITEMS.items():
+        if key in found:
             parsed["procedure_or_item"] = value
             break
     
-    # Location extraction (can be expanded for international)
-    locations = ["pune", "mumbai", "delhi", "bangalore", "chennai", "hyderabad", "kolkata", 
-                "ahmedabad", "jaipur", "lucknow", "kanpur", "nagpur", "indore", "bhopal"]
-    for location in locations:
-        if location.lower() in query.lower():
+    for location in LOCATIONS:
+        if location in found:
             parsed["location"] = location.title()
             break
     
     # Duration/Period extraction (more generic)
-    duration_patterns = [
-        (r'(\d+)\s*[-\s]*month', "months"),
-        (r'(\d+)\s*[-\s]*year', "years"),
-        (r'(\d+)\s*[-\s]*day', "days"),
-        (r'(\d+)\s*[-\s]*week', "weeks")
-    ]
-    
-    for pattern, unit in duration_patterns:
-        duration_match = re.search(pattern, query, re.IGNORECASE)
+    for pattern, unit in DURATION_PATTERNS:
+        duration_match = pattern.search(query)
         if duration_match:
             parsed["duration_or_period"] = f"{duration_match.group(1)} {unit}"
             break
     
-    # Category detection (domain identification)
-    categories = {
-        "insurance": ["insurance", "policy", "claim", "coverage", "premium"],
-        "legal": ["contract", "agreement", "legal", "clause", "terms"],
-        "hr": ["employee", "hr", "leave", "salary", "promotion", "performance"],
-        "medical": ["medical", "health", "treatment", "surgery", "doctor", "hospital"],
-        "financial": ["loan", "credit", "payment", "finance", "bank", "interest"]
-    }
-    
-    for category, keywords in categories.items():
-        if any(keyword.lower() in query.lower() for keyword in keywords):
+    for category, keywords in QUERY_CATEGORIES.items():
+        if any(keyword in found for keyword in keywords):
             parsed["category"] = category
             break
     
     return parsed
 
+def parse_queries(queries: List[str]) -> List[Dict[str, Any]]:
+    """Batch form of parse_query"""
+    return [parse_query(query) for query in queries]
+
 # === STEP 3: IMPROVED FAISS SEARCH ===
 
-def build_improved_faiss_index(chunks: List[Dict[str, Any]]):
+def embed_texts(model, texts: List[str], batch_size: int = EMBED_BATCH_SIZE,
+                workers: int = EMBED_WORKERS, pool=None) -> np.ndarray:
+    """Encode texts in batches (optionally across a process pool) into one matrix of unit-length float32 rows
+
+    Pass a running multi-process `pool` to reuse it across calls instead of
+    starting one per call.
+    """
+    if not texts:
+        dim = model.get_sentence_embedding_dimension()
+        return np.empty((0, dim), dtype="float32")
+
+    if pool is not None:
+        vectors = model.encode_multi_process(texts, pool, batch_size=batch_size)
+    # A process pool only pays off once every worker gets several batches
+    elif workers > 1 and len(texts) >= batch_size * workers * 2:
+        pool = model.start_multi_process_pool(target_devices=["cpu"] * workers)
+        try:
+            vectors = model.encode_multi_process(texts, pool, batch_size=batch_size)
+        finally:
+            model.stop_multi_process_pool(pool)
+    else:
+        vectors = model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=len(texts) > batch_size,
+            convert_to_numpy=True
+        )
+
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    faiss.normalize_L2(vectors)  # inner product == cosine similarity
+    return vectors
+
+def embed_chunk_texts(model, texts: List[str], model_name: str = EMBEDDING_MODEL_NAME, pool=None):
+    """Embed chunk texts, encoding only those not already in the embedding cache.
+
+    Returns (vectors, stats) where stats holds the cache hit/miss counts.
+    """
+    if not EMBEDDING_CACHE_DIR or not texts:
+        return embed_texts(model, texts, pool=pool), {"hits": 0, "misses": len(texts)}
+
+    cache = open_embedding_cache(EMBEDDING_CACHE_DIR, model_name, model.get_sentence_embedding_dimension())
+    keys = [chunk_key(text, model_name) for text in texts]
+    vectors, missing = cache.lookup(keys)
+
+    if missing:
+        new_vectors = embed_texts(model, [texts[pos] for pos in missing], pool=pool)
+        vectors[missing] = new_vectors
+        cache.add([keys[pos] for pos in missing], new_vectors)
+    faiss.normalize_L2(vectors)  # entries cached before embeddings were normalized
+
+    return vectors, {"hits": len(texts) - len(missing), "misses": len(missing)}
+
+def document_label(source: str) -> str:
+    """Short name for a document path or URL"""
+    return os.path.basename(urlparse(source).path) or source
+
+def merge_document_chunks(sources: List[str], chunk_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Concatenate several documents' chunks, tagging each with its document_id (position in sources)"""
+    return [
+        {**chunk, "document_id": document_id, "document": document_label(source)}
+        for document_id, (source, chunks) in enumerate(zip(sources, chunk_lists))
+        for chunk in chunks
+    ]
+
+def build_improved_faiss_index(chunks: List[Dict[str, Any]], model=None):
     """Build FAISS index from meaningful chunks"""
-    model = SentenceTransformer("all-MiniLM-L6-v2")
+    if model is None:
+        model = get_embedding_model(EMBEDDING_MODEL_NAME)
     
-    vectors = []
-    metadatas = []
+    if not chunks:
+        raise ValueError("No chunks to embed!")
     
     print(f"Processing {len(chunks)} chunks...")
     
-    for chunk in tqdm(chunks, desc="Embedding chunks"):
-        vector = model.encode(chunk["text"])
-        vectors.append(vector)
-        metadatas.append({
-            "text": chunk["text"],
-            "page": chunk["page"],
-            "type": chunk["type"]
-        })
-    
-    if not vectors:
-        raise ValueError("No chunks to embed!")
+    metadatas = ChunkStore.from_chunks(chunks)
+    vec_np, cache_stats = embed_chunk_texts(model, [chunk["text"] for chunk in chunks])
+    print(f"🧠 Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
     
-    vec_np = np.array(vectors).astype("float32")
-    dim = vec_np.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(vec_np)
+    index = build_index(vec_np, INDEX_TYPE, faiss.METRIC_INNER_PRODUCT, storage=VECTOR_STORAGE)
+    if RERANK_FACTOR > 0:
+        metadatas.vectors = vec_np
     
     return model, index, metadatas
 
-def search_relevant_chunks(query: str, model, index, metadatas, k=10):
-    """Search for relevant chunks with better filtering"""
-    # Search with original query
-    query_vector = model.encode(query)
-    query_np = np.array([query_vector]).astype("float32")
-    D, I = index.search(query_np, k)
-    
-    results = []
-    for i, distance in zip(I[0], D[0]):
-        # More relaxed threshold to get results
-        if distance < 1.5:  # Increased threshold
-            results.append({
-                **metadatas[i],
-                "similarity_score": float(distance)
-            })
-    
-    # If no results with threshold, return top 3 anyway
-    if not results:
-        for i in range(min(3, len(I[0]))):
-            results.append({
-                **metadatas[I[0][i]],
-                "similarity_score": float(D[0][i])
-            })
-    
-    return results
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most batch_size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
-def create_fallback_response(parsed_query: Dict, retrieved_chunks: List[Dict]) -> Dict[str, Any]:
-    """Create generic rule-based response when LLM fails - works for any document type"""
-    if not retrieved_chunks:
-        return {
-            "decision": "unknown",
-            "amount": "N/A",
-            "justification": "No relevant information found in the provided documents."
-        }
+def build_faiss_index_streaming(chunks: Iterable[Dict[str, Any]], model=None,
+                                batch_size: int = EMBED_BATCH_SIZE, expected_chunks: Optional[int] = None):
+    """Build the FAISS index while chunks are still being extracted.
+
+    Chunks are embedded in micro-batches that go straight into the index, so
+    only one batch of texts and vectors is alive at a time. With EMBED_WORKERS
+    > 1 a micro-batch is big enough to give every worker several encoder
+    batches, and one process pool (started once the first full micro-batch
+    arrives) serves the whole stream. Returns
+    (model, index, metadatas); the index is empty when no chunks arrive.
+    `expected_chunks` (an estimate is fine) lets "auto" pick the index type
+    for the whole corpus rather than for the first training sample.
+    """
+    if model is None:
+        model = get_embedding_model(EMBEDDING_MODEL_NAME)
     
-    # Generic approach - analyze the best matching chunks for any document type
-    best_chunk = retrieved_chunks[0]
-    chunk_text = best_chunk['text'].lower()
+    dim = model.get_sentence_embedding_dimension()
+    builder = IncrementalIndexBuilder(dim, INDEX_TYPE, faiss.METRIC_INNER_PRODUCT, storage=VECTOR_STORAGE,
+                                      expected_total=expected_chunks)
+    store = ChunkStoreBuilder()
+    exact_vectors = []  # float32 copies for re-ranking, only when enabled
+    hits = misses = 0
+    group_size = batch_size * EMBED_WORKERS * 2 if EMBED_WORKERS > 1 else batch_size
+    pool = None
     
-    # Look for positive/approval indicators (generic across domains)
-    positive_indicators = [
-        'approved', 'eligible', 'entitled', 'covered', 'included', 'allowed', 
+    try:
+        for batch in iter_batches(chunks, group_size):
+            if pool is None and EMBED_WORKERS > 1 and len(batch) == group_size:
+                pool = model.start_multi_process_pool(target_devices=["cpu"] * EMBED_WORKERS)
+            texts = [chunk["text"] for chunk in batch]
+            vectors, cache_stats = embed_chunk_texts(model, texts, pool=pool)
+            builder.add(vectors)
+            if RERANK_FACTOR > 0:
+                exact_vectors.append(vectors)
+            hits += cache_stats["hits"]
+            misses += cache_stats["misses"]
+            store.extend(batch)
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+    
+    print(f"Processed {len(store)} chunks (streaming)")
+    print(f"🧠 Embedding cache: {hits} hits, {misses} misses")
+    metadatas = store.finish()
+    if RERANK_FACTOR > 0:
+        metadatas.vectors = np.concatenate(exact_vectors) if exact_vectors else np.empty((0, dim), dtype="float32")
+    return model, builder.finish(), metadatas
+
+def range_search_index(index, query_vectors: np.ndarray, k: int, metadatas: ChunkStore, params=None,
+                       threshold: float = SIMILARITY_THRESHOLD) -> List[tuple]:
+    """Per query, (ids, cosine similarities) of at most k chunks above threshold, best first.
+
+    With RERANK_FACTOR set, up to k * factor hits from the (quantized) index
+    are re-scored with the store's float32 vectors before the cut.
+    """
+    query_vectors = np.ascontiguousarray(query_vectors, dtype="float32")
+    if RERANK_FACTOR <= 0 or metadatas.vectors is None:
+        return range_search(index, query_vectors, threshold, k, params)
+
+    hits = range_search(index, query_vectors, threshold, k * RERANK_FACTOR, params)
+    candidates = np.full((len(hits), max((len(ids) for ids, _ in hits), default=0)), -1, dtype="int64")
+    for row, (ids, _) in enumerate(hits):
+        candidates[row, :len(ids)] = ids
+    D, I = rerank_exact(query_vectors, candidates, metadatas.vectors, k, index.metric_type)
+    return [(I[row][D[row] > threshold], D[row][D[row] > threshold]) for row in range(len(hits))]
+
+def collect_search_results(ids, similarities, metadatas) -> List[Dict[str, Any]]:
+    """Turn one query's range-search hits into result views"""
+    return metadatas.results(ids, ({"similarity_score": float(similarity)} for similarity in similarities))
+
+def search_relevant_chunks(query: str, model, index, metadatas, k=10):
+    """Up to k chunks whose cosine similarity to the query passes SIMILARITY_THRESHOLD"""
+    return search_relevant_chunks_batch([query], model, index, metadatas, k=k)[0]
+
+def search_relevant_chunks_batch(queries: List[str], model, index, metadatas, k=10) -> List[List[Dict[str, Any]]]:
+    """Search for several queries with one encoder pass and one range search"""
+    if not queries:
+        return []
+    query_np = embed_texts(model, queries, workers=0)
+    return search_relevant_chunks_by_vectors(query_np, index, metadatas, k=k)
+
+def search_relevant_chunks_by_vectors(query_vectors: np.ndarray, index, metadatas, k=10) -> List[List[Dict[str, Any]]]:
+    """Search with already-embedded queries (one row per query) in one range search"""
+    if not len(query_vectors):
+        return []
+    return [collect_search_results(ids, similarities, metadatas)
+            for ids, similarities in range_search_index(index, query_vectors, k, metadatas)]
+
+def build_keyword_index(metadatas: ChunkStore) -> BM25Index:
+    """BM25 inverted index over the chunk texts (row ids match the FAISS index)"""
+    return BM25Index.build(metadatas.texts())
+
+def hybrid_search_by_vectors(queries: List[str], query_vectors: np.ndarray, index, metadatas,
+                             keyword_index: BM25Index = None, k=10, rrf_k=RRF_K,
+                             documents: Optional[Iterable[int]] = None,
+                             document_boosts: Optional[Dict[int, float]] = None) -> List[List[Dict[str, Any]]]:
+    """Fuse FAISS and BM25 rankings per query with reciprocal-rank fusion.
+
+    Semantic hits come from a range search (cosine similarity above
+    SIMILARITY_THRESHOLD, at most k). Each result carries similarity_score
+    (cosine, None if only BM25 found it), bm25_score (None if only FAISS found
+    it) and the fused rrf_score.
+    `documents` restricts retrieval to those document_ids (inside FAISS via an
+    ID selector, so other documents never crowd out hits); `document_boosts` multiplies
+    the fused score of each document's chunks.
+    """
+    if not queries:
+        return []
+    allowed = None
+    params = None
+    if documents is not None:
+        allowed = metadatas.document_mask(documents)
+        params = filtered_search_params(index, np.flatnonzero(allowed))
+    semantic_hits = range_search_index(index, query_vectors, k, metadatas, params)
+    keyword_hits = (keyword_index.search_batch(queries, k, allowed) if keyword_index is not None
+                    else [[] for _ in queries])
+
+    all_results = []
+    for row in range(len(queries)):
+        fused: Dict[int, Dict[str, Any]] = {}
+        for rank, (i, similarity) in enumerate(zip(*semantic_hits[row])):
+            fused[int(i)] = {"similarity_score": float(similarity), "bm25_score": None,
+                             "rrf_score": 1.0 / (rrf_k + rank + 1)}
+        for rank, (i, score) in enumerate(keyword_hits[row]):
+            entry = fused.setdefault(i, {"similarity_score": None, "bm25_score": None, "rrf_score": 0.0})
+            entry["bm25_score"] = score
+            entry["rrf_score"] += 1.0 / (rrf_k + rank + 1)
+        if document_boosts:
+            for i, entry in fused.items():
+                entry["rrf_score"] *= document_boosts.get(metadatas.document_id(i), 1.0)
+
+        ranked = sorted(fused.items(), key=lambda item: item[1]["rrf_score"], reverse=True)[:k]
+        all_results.append(metadatas.results((i for i, _ in ranked), (scores for _, scores in ranked)))
+    return all_results
+
+def hybrid_search_batch(queries: List[str], model, index, metadatas, keyword_index: BM25Index = None,
+                        k=10, documents: Optional[Iterable[int]] = None,
+                        document_boosts: Optional[Dict[int, float]] = None) -> List[List[Dict[str, Any]]]:
+    """Hybrid FAISS + BM25 retrieval for several queries with one encoder pass"""
+    if not queries:
+        return []
+    query_np = embed_texts(model, queries, workers=0)
+    return hybrid_search_by_vectors(queries, query_np, index, metadatas, keyword_index, k=k,
+                                    documents=documents, document_boosts=document_boosts)
+
+def chunk_vectors(index, metadatas: ChunkStore, chunk_ids: List[int]) -> Optional[np.ndarray]:
+    """Stored embeddings of the given chunks: the re-rank vectors, else decoded from the index (None for IVF)"""
+    ids = np.asarray(chunk_ids, dtype="int64")
+    if metadatas.vectors is not None:
+        return np.asarray(metadatas.vectors[ids], dtype="float32")
+    try:
+        return index.reconstruct_batch(ids)
+    except RuntimeError:
+        return None  # IVF indexes keep no id -> list map
+
+def pack_retrieved_chunks(all_results: List[List[Dict[str, Any]]], index, metadatas: ChunkStore,
+                          token_budget: int = CONTEXT_TOKEN_BUDGET) -> List[tuple]:
+    """Per query, (chunks for the prompt, packing stats): deduplicated, diverse, within the token budget"""
+    packer = ContextPacker(token_budget, CONTEXT_DIVERSITY)
+    return [
+        packer.pack(results, chunk_vectors(index, metadatas, [chunk["chunk_id"] for chunk in results])
+                    if results else None)
+        for results in all_results
+    ]
+
+def describe_packing(stats: Dict[str, int]) -> str:
+    return (f"{stats['context_tokens']} tokens from {stats['chunks_sent']}/{stats['chunks_retrieved']} chunks "
+            f"({stats['duplicates_dropped']} duplicates dropped, ~{stats['tokens_saved']} tokens saved)")
+
+# Indicator vocabularies for the rule-based fallback (domain-agnostic)
+FALLBACK_INDICATORS = {
+    "positive": [
+        'approved', 'eligible', 'entitled', 'covered', 'included', 'allowed',
         'permitted', 'authorized', 'valid', 'accepted', 'qualified', 'yes',
         'benefit', 'payable', 'reimbursed', 'compensated', 'supported'
-    ]
-    
-    # Look for negative/rejection indicators
-    negative_indicators = [
-        'rejected', 'denied', 'excluded', 'not eligible', 'not covered', 
+    ],
+    "negative": [
+        'rejected', 'denied', 'excluded', 'not eligible', 'not covered',
         'not allowed', 'prohibited', 'restricted', 'invalid', 'declined',
         'not applicable', 'not payable', 'limitation', 'exclude', 'no'
-    ]
-    
-    # Look for conditional indicators (require more information)
-    conditional_indicators = [
+    ],
+    "conditional": [
         'subject to', 'provided that', 'if', 'unless', 'condition', 'requirement',
         'must', 'shall', 'need to', 'dependent on', 'based on'
     ]
+}
+# Short, ambiguous words count for less than specific terms
+FALLBACK_WEAK_INDICATORS = {'yes', 'no', 'if', 'must', 'shall', 'valid'}
+FALLBACK_WEAK_WEIGHT = 0.5
+
+INDICATOR_CATEGORY = {
+    indicator: category
+    for category, indicators in FALLBACK_INDICATORS.items()
+    for indicator in indicators
+}
+# One alternation, longest first, so "not covered" wins over "covered" at the same position.
+# Searched against lowercased text: several times faster than re.IGNORECASE
+INDICATOR_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(re.escape(i) for i in sorted(INDICATOR_CATEGORY, key=len, reverse=True)) + r')\b'
+)
+
+# Amounts/values, most specific kind first: currency, then percentages, then periods
+AMOUNT_PATTERN = re.compile(
+    r'(?P<currency>(?:₹|\$|\brupees?\b|\brs\b\.?|\busd\b)\s*\d[\d,]*(?:\.\d+)?)'
+    r'|(?P<percent>\b\d+(?:\.\d+)?\s*%)'
+    r'|(?P<period>\b\d+\s*(?:days?|months?|years?)\b)',
+    re.IGNORECASE
+)
+AMOUNT_KINDS = ("currency", "percent", "period")
+
+def score_chunk_indicators(text: str) -> Dict[str, float]:
+    """Weighted positive/negative/conditional evidence in one chunk, from a single regex pass"""
+    scores = {category: 0.0 for category in FALLBACK_INDICATORS}
+    for match in INDICATOR_PATTERN.finditer(text.lower()):
+        indicator = match.group(0)
+        scores[INDICATOR_CATEGORY[indicator]] += (
+            FALLBACK_WEAK_WEIGHT if indicator in FALLBACK_WEAK_INDICATORS else 1.0
+        )
+    return scores
+
+def find_amount(text: str) -> Optional[str]:
+    """Most specific amount/value mentioned in `text` (currency > percentage > period), or None"""
+    best = {}
+    for match in AMOUNT_PATTERN.finditer(text):
+        best.setdefault(match.lastgroup, match.group(0).strip())
+    for kind in AMOUNT_KINDS:
+        if kind in best:
+            return best[kind]
+    return None
+
+def create_fallback_response(parsed_query: Dict, retrieved_chunks: List[Dict]) -> Dict[str, Any]:
+    """Create generic rule-based response when LLM fails - works for any document type
+
+    Every retrieved chunk is scored; a chunk's evidence is weighted by 1 / (rank + 1)
+    so the best matches dominate while later chunks can still tip the decision.
+    """
+    if not retrieved_chunks:
+        return {
+            "decision": "unknown",
+            "amount": "N/A",
+            "justification": "No relevant information found in the provided documents."
+        }
     
-    # Look for amount/value indicators (monetary or quantitative)
-    amount_indicators = [
-        '₹', '$', 'rupees', 'dollars', 'amount', 'value', 'limit', 'maximum', 
-        'minimum', 'sum', 'total', 'cost', 'fee', 'charge', 'price'
-    ]
-    
-    # Count matches
-    positive_matches = sum(1 for indicator in positive_indicators if indicator in chunk_text)
-    negative_matches = sum(1 for indicator in negative_indicators if indicator in chunk_text)
-    conditional_matches = sum(1 for indicator in conditional_indicators if indicator in chunk_text)
-    
-    # Extract potential amounts/values from the text
-    amount_patterns = [
-        r'₹\s*[\d,]+',  # ₹50,000
-        r'\$\s*[\d,]+',  # $1,000
-        r'rupees?\s+[\d,]+',  # rupees 50000
-        r'rs\.?\s*[\d,]+',  # Rs. 50000
-        r'usd?\s*[\d,]+',  # USD 1000
-        r'amount.?₹\s[\d,]+',  # amount ₹50000
-        r'limit.?₹\s[\d,]+',  # limit ₹50000
-        r'maximum.?₹\s[\d,]+',  # maximum ₹50000
-        r'\d+\s*%',  # 50%
-        r'\d+\s*(days?|months?|years?)',  # 30 days, 6 months
-    ]
+    totals = {category: 0.0 for category in FALLBACK_INDICATORS}
+    chunk_scores = []
+    for rank, chunk in enumerate(retrieved_chunks):
+        weight = 1.0 / (rank + 1)
+        scores = score_chunk_indicators(chunk['text'])
+        for category, score in scores.items():
+            totals[category] += weight * score
+        chunk_scores.append((weight, scores))
     
-    found_amounts = []
-    for pattern in amount_patterns:
-        matches = re.findall(pattern, chunk_text, re.IGNORECASE)
-        found_amounts.extend(matches)
+    def strongest_chunk(category: str) -> Dict:
+        """Chunk contributing the most evidence for `category`"""
+        best = max(range(len(retrieved_chunks)),
+                   key=lambda i: chunk_scores[i][0] * chunk_scores[i][1][category])
+        return retrieved_chunks[best]
     
     # Decision logic based on indicators (domain-agnostic)
-    if negative_matches > positive_matches and negative_matches > 0:
+    if totals["negative"] > totals["positive"] and totals["negative"] > 0:
         decision = "rejected"
+        evidence = strongest_chunk("negative")
         amount = "N/A"
-        justification = f"Negative indicators found in document (Page {best_chunk['page']}): {best_chunk['text'][:150]}..."
-    elif positive_matches > 0:
+        justification = f"Negative indicators found in document (Page {evidence['page']}): {evidence['text'][:150]}..."
+    elif totals["positive"] > 0:
         decision = "approved"
-        if found_amounts:
-            amount = found_amounts[0]  # Use first found amount/value
-        else:
-            amount = "As per document terms"
-        justification = f"Positive indicators found in document (Page {best_chunk['page']}): {best_chunk['text'][:150]}..."
-    elif conditional_matches > 0:
+        evidence = strongest_chunk("positive")
+        amount = find_amount(evidence['text']) or "As per document terms"
+        justification = f"Positive indicators found in document (Page {evidence['page']}): {evidence['text'][:150]}..."
+    elif totals["conditional"] > 0:
         decision = "conditional"
+        evidence = strongest_chunk("conditional")
         amount = "Subject to conditions"
-        justification = f"Conditional terms found - requires verification (Page {best_chunk['page']}): {best_chunk['text'][:150]}..."
+        justification = f"Conditional terms found - requires verification (Page {evidence['page']}): {evidence['text'][:150]}..."
     else:
         decision = "unknown"
+        evidence = retrieved_chunks[0]
         amount = "N/A"
-        justification = f"Found related information but decision unclear (Page {best_chunk['page']}): {best_chunk['text'][:150]}..."
+        justification = f"Found related information but decision unclear (Page {evidence['page']}): {evidence['text'][:150]}..."
     
     return {
         "decision": decision,
@@ -490,24 +915,24 @@ def create_fallback_response(parsed_query: Dict, retrieved_chunks: List[Dict]) -
 
 # === STEP 4: IMPROVED LLM INTEGRATION ===
 
-def get_structured_response(query: str, parsed_query: Dict, retrieved_chunks: List[Dict]) -> str:
-    """Get natural language answer from LLM based only on document context"""
-
-    if not retrieved_chunks:
-        return "I couldn't find relevant information in the provided document excerpts."
+def chunk_source(chunk: Dict) -> str:
+    return f"{chunk['document']}, Page {chunk['page']}" if "document" in chunk else f"Page {chunk['page']}"
 
-    # Prepare document context
-    context = ""
-    for i, chunk in enumerate(retrieved_chunks):
-        context += f"[Document Chunk {i+1} - Page {chunk['page']}]:\n{chunk['text']}\n\n"
+def build_llm_messages(query: str, retrieved_chunks: List[Dict]) -> List[Dict[str, str]]:
+    """Chat messages asking the LLM to answer `query` from the retrieved chunks only"""
+    # Prepare document context (chunks are expected to be packed to the token budget already)
+    context = "".join(
+        f"[Document Chunk {i+1} - {chunk_source(chunk)}]:\n{chunk['text']}\n\n"
+        for i, chunk in enumerate(retrieved_chunks)
+    )
 
     # Updated system prompt
-    system_prompt = """You are a document assistant. 
+    system_prompt = f"""You are a document assistant. 
 Your task is to answer user queries based ONLY on the provided document chunks. 
 Respond clearly in natural language and cite the page number if relevant. 
 Do NOT use any external knowledge. 
 If the answer isn't present in the document, reply: 
-"I couldn't find relevant information in the provided document excerpts."""
+"{NO_ANSWER}"""
 
     # Updated user prompt
     user_prompt = f"""You are given the following document excerpts:
@@ -520,37 +945,46 @@ Based only on the above information, answer the following question:
 
 Please provide a clear, concise answer as found in the document. Reference the page number if helpful."""
 
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def build_llm_payload(model_name: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    return {
+        "model": model_name,
+        "messages": messages,
+        "temperature": 0.3,
+        "max_tokens": 500
+    }
+
+def llm_headers() -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {PPLX_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+# Keep-alive connection pool for the synchronous (CLI) path
+_llm_session = requests.Session()
+
+def get_structured_response(query: str, parsed_query: Dict, retrieved_chunks: List[Dict]) -> str:
+    """Get natural language answer from LLM based only on document context"""
+
+    if not retrieved_chunks:
+        return NO_ANSWER
+
+    messages = build_llm_messages(query, retrieved_chunks)
+
     if not PPLX_API_KEY:
         print("⚠  No API key found, using fallback response")
-        return "I couldn't find relevant information in the provided document excerpts."
-
-    models_to_try = [
-        "sonar",
-        "sonar-pro",
-        "llama-3.1-sonar-small-128k-online",
-        "llama-3.1-sonar-large-128k-online"
-    ]
+        return NO_ANSWER
 
-    for model_name in models_to_try:
+    for model_name in MODELS_TO_TRY:
         try:
-            url = "https://api.perplexity.ai/chat/completions"
-            payload = {
-                "model": model_name,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.3,
-                "max_tokens": 500
-            }
-
-            headers = {
-                "Authorization": f"Bearer {PPLX_API_KEY}",
-                "Content-Type": "application/json"
-            }
+            payload = build_llm_payload(model_name, messages)
 
             print(f"🔧 Calling Perplexity model: {model_name}")
-            response = requests.post(url, json=payload, headers=headers)
+            response = _llm_session.post(PPLX_API_URL, json=payload, headers=llm_headers(), timeout=LLM_TIMEOUT)
 
             if response.status_code == 200:
                 answer = response.json()["choices"][0]["message"]["content"]
@@ -565,64 +999,78 @@ Please provide a clear, concise answer as found in the document. Reference the p
             continue
 
     print("⚠  All models failed, returning fallback answer.")
-    return "I couldn't find relevant information in the provided document excerpts."
+    return NO_ANSWER
 
 def download_pdf_from_url(url: str, save_path: str = "temp_downloaded.pdf") -> str:
     """Download PDF from a URL and save it locally"""
-    response = requests.get(url)
-    if response.status_code == 200 and "application/pdf" in response.headers.get("Content-Type", ""):
-        with open(save_path, "wb") as f:
-            f.write(response.content)
+    response = open_download(url)
+    content_type = response.headers.get("Content-Type", "")
+    if "application/pdf" in content_type:
+        save_response(response, dest_path=save_path)
         print(f"✅ PDF downloaded successfully from {url}")
         return save_path
     else:
-        raise ValueError(f"Failed to download PDF. Status: {response.status_code}, Content-Type: {response.headers.get('Content-Type')}")
-
-# === MAIN EXECUTION ===
-def main():
-   print("🚀 Starting document processing pipeline...\n")
-   
-   # Configure your file here - can be URL or local file
-   if len(sys.argv) > 1:
-    file_input = sys.argv[1]
-    print(f"📁 Using local file: {file_input}")
-   else:
-    print("❌ No file provided. Please specify a file path.")
-    sys.exit(1)
+        response.close()
+        raise ValueError(f"Failed to download PDF. Status: {response.status_code}, Content-Type: {content_type}")
 
-
-   # file_input = "local_file.eml"  # or .msg, .docx, .pdf
-   
-   # Step 1: Extract meaningful chunks based on file type
+def extract_file_chunks(file_input: str, download_path: str = "temp_downloaded.pdf") -> List[Dict[str, Any]]:
+   """Chunks of one local file or PDF URL, dispatched on file type; [] when it can't be read"""
    if file_input.startswith('http') and '.pdf' in file_input:
        try:
-           file_path = download_pdf_from_url(file_input)
+           file_path = download_pdf_from_url(file_input, download_path)
            print("📄 Extracting meaningful chunks from PDF...")
-           chunks = extract_meaningful_chunks(file_path)
+           return extract_meaningful_chunks(file_path)
        except Exception as e:
            print(f"❌ Error downloading PDF: {e}")
-           return
+           return []
    elif file_input.lower().endswith('.pdf'):
        if not os.path.exists(file_input):
            print(f"❌ PDF file not found: {file_input}")
-           return
+           return []
        print("📄 Extracting meaningful chunks from PDF...")
-       chunks = extract_meaningful_chunks(file_input)
+       return extract_meaningful_chunks(file_input)
    elif file_input.lower().endswith(('.eml', '.msg')):
        if not os.path.exists(file_input):
            print(f"❌ Email file not found: {file_input}")
-           return
+           return []
        print("📧 Extracting meaningful chunks from Email...")
-       chunks = extract_email_chunks(file_input)
+       return extract_email_chunks(file_input)
    elif file_input.lower().endswith('.docx'):
        if not os.path.exists(file_input):
            print(f"❌ DOCX file not found: {file_input}")
-           return
+           return []
        print("📝 Extracting meaningful chunks from DOCX...")
-       chunks = extract_docx_chunks(file_input)  # You'll need this function
+       return extract_docx_chunks(file_input)
    else:
        print(f"❌ Unsupported file type: {file_input}")
-       return
+       return []
+
+# === MAIN EXECUTION ===
+def main():
+   print("🚀 Starting document processing pipeline...\n")
+   
+   # Configure your files here - local paths or URLs; several documents share one index
+   if len(sys.argv) > 1:
+    file_inputs = sys.argv[1:]
+    print(f"📁 Using {len(file_inputs)} document(s): {', '.join(file_inputs)}")
+   else:
+    print("❌ No file provided. Please specify one or more file paths.")
+    sys.exit(1)
+
+
+   # file_input = "local_file.eml"  # or .msg, .docx, .pdf
+   
+   # Step 1: Extract meaningful chunks based on file type
+   if len(file_inputs) == 1:
+       chunks = extract_file_chunks(file_inputs[0])
+   else:
+       # Documents are downloaded and extracted in parallel, one process each
+       download_paths = [f"temp_downloaded_{i}.pdf" for i in range(len(file_inputs))]
+       with ProcessPoolExecutor(max_workers=min(len(file_inputs), os.cpu_count() or 1)) as executor:
+           chunk_lists = list(executor.map(extract_file_chunks, file_inputs, download_paths))
+       for document_id, (file_input, document_chunks) in enumerate(zip(file_inputs, chunk_lists)):
+           print(f"  [{document_id}] {document_label(file_input)}: {len(document_chunks)} chunks")
+       chunks = merge_document_chunks(file_inputs, chunk_lists)
    
    print(f"✅ Extracted {len(chunks)} meaningful chunks")
    
@@ -652,8 +1100,12 @@ def main():
                         
     ]
     
+   keyword_index = build_keyword_index(metadatas)
+
    all_final_responses = []
-   for query in test_queries:
+   all_results = hybrid_search_batch(test_queries, model, index, metadatas, keyword_index, k=100)
+   all_packed = pack_retrieved_chunks(all_results, index, metadatas)
+   for query, results, (context_chunks, packing) in zip(test_queries, all_results, all_packed):
         print(f"\n" + "="*50)
         print(f"🔍 Query: {query}")
         
@@ -661,42 +1113,19 @@ def main():
         parsed = parse_query(query)
         print(f"📋 Parsed: {parsed}")
         
-        # Search documents
-        results = search_relevant_chunks(query, model, index, metadatas, k=100)
-        print(f"\n📚 Found {len(results)} relevant chunks:")
+        # Search documents (all queries were searched in one batch above)
+        print(f"\n📚 Found {len(results)} relevant chunks (semantic + keyword):")
         
         for i, result in enumerate(results[:5]):
-            print(f"  {i+1}. (Page {result['page']}, Score: {result['similarity_score']:.3f})")
+            semantic = "-" if result['similarity_score'] is None else f"{result['similarity_score']:.3f}"
+            keyword = "-" if result['bm25_score'] is None else f"{result['bm25_score']:.2f}"
+            print(f"  {i+1}. ({chunk_source(result)}, Similarity: {semantic}, BM25: {keyword})")
             print(f"     {result['text'][:200]}...")
         
-        # Debug: Show what keywords the search might be missing
-        print(f"\n🔍 Debug: Searching for keywords like: {query.lower().split()}")
-        
-        # Let's also try keyword-based search as backup
-        keyword_matches = []
-        query_words = [w.lower() for w in query.split() if len(w) > 3]
-        
-        for i, meta in enumerate(metadatas):
-            text_lower = meta['text'].lower()
-            matches = sum(1 for word in query_words if word in text_lower)
-            if matches > 0:
-                keyword_matches.append({
-                    **meta,
-                    "keyword_matches": matches,
-                    "chunk_index": i
-                })
-        
-        keyword_matches.sort(key=lambda x: x['keyword_matches'], reverse=True)
-        
-        if keyword_matches:
-            print(f"\n🔑 Keyword-based matches found: {len(keyword_matches[:3])}")
-            for i, match in enumerate(keyword_matches[:3]):
-                print(f"  {i+1}. (Page {match['page']}, {match['keyword_matches']} matches)")
-                print(f"     {match['text'][:200]}...")
-        
         # Get structured response
+        print(f"\n🧮 Context: {describe_packing(packing)}")
         print(f"\n🧠 Getting LLM response...")
-        final_response = get_structured_response(query, parsed, results)
+        final_response = get_structured_response(query, parsed, context_chunks)
         print(f"✅ Final Response:")
         # Storing the response in a new list
         all_final_responses.append(final_response) 
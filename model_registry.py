@@ -0,0 +1,68 @@
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from sentence_transformers import SentenceTransformer
+
+
+class ModelRegistry:
+    """Process-wide, thread-safe cache of named SentenceTransformer encoders.
+
+    Each encoder is loaded at most once per process; concurrent callers asking
+    for the same name wait on that name's lock instead of loading a second copy.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, SentenceTransformer] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._registry_lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str, model_name: Optional[str] = None) -> SentenceTransformer:
+        """Return the encoder registered as `name`, loading `model_name` (defaults to `name`) on first use"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock_for(name):
+            model = self._models.get(name)
+            if model is None:
+                start = time.perf_counter()
+                try:
+                    model = SentenceTransformer(model_name or name)
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._load_seconds[name] = time.perf_counter() - start
+                self._errors.pop(name, None)
+                self._models[name] = model
+        return model
+
+    def preload(self, names: List[str]) -> None:
+        """Load every named encoder up front (e.g. at server startup)"""
+        for name in names:
+            self.get(name)
+
+    def is_ready(self, names: Optional[List[str]] = None) -> bool:
+        if names is None:
+            return bool(self._models)
+        return all(name in self._models for name in names)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "loaded": {name: round(secs, 3) for name, secs in self._load_seconds.items()},
+            "errors": dict(self._errors)
+        }
+
+
+registry = ModelRegistry()
+
+
+def get_embedding_model(name: str) -> SentenceTransformer:
+    """Shared encoder for `name` from the process-wide registry"""
+    return registry.get(name)
@@ -0,0 +1,135 @@
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ModelStats:
+    """Health, latency and routing counters for one model"""
+
+    def __init__(self, window: int):
+        self.latencies = deque(maxlen=window)  # seconds, successful calls only
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trial_started_at = 0.0
+        self.consecutive_failures = 0
+        self.counters = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "skipped_open": 0,
+            "breaker_opened": 0,
+            "hedges_sent": 0,
+            "hedges_won": 0
+        }
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        return float(np.percentile(self.latencies, q))
+
+
+class ModelRouter:
+    """Orders the model fallback chain by health and decides when to hedge.
+
+    A model's circuit opens after `failure_threshold` consecutive failures and
+    it is skipped until `reset_timeout` seconds pass; then it is offered again,
+    and the first call actually dispatched to it becomes the trial (half-open)
+    whose outcome closes or re-opens the circuit. A trial that never reports
+    back (e.g. a cancelled hedge) is given up after another `reset_timeout`.
+    Once a model has `min_samples` latencies, a request still running past its
+    `hedge_percentile` latency gets a hedged request to the next model.
+    Meant to be used from one event loop, so it needs no locking.
+    """
+
+    def __init__(self, models: List[str], failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 hedge_percentile: float = 95.0, min_samples: int = 20, window: int = 200):
+        self.models = list(models)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.stats: Dict[str, ModelStats] = {name: ModelStats(window) for name in self.models}
+
+    def _available(self, name: str, now: float) -> bool:
+        stats = self.stats[name]
+        if stats.state == OPEN:
+            return now - stats.opened_at >= self.reset_timeout
+        if stats.state == HALF_OPEN:
+            return now - stats.trial_started_at >= self.reset_timeout  # trial never reported back
+        return True
+
+    def candidates(self) -> List[str]:
+        """Models to try, in preference order, skipping those with an open circuit"""
+        now = time.monotonic()
+        available = []
+        for name in self.models:
+            if self._available(name, now):
+                available.append(name)
+            else:
+                self.stats[name].counters["skipped_open"] += 1
+        # Every circuit open: try them all rather than fail without a call
+        return available or list(self.models)
+
+    def hedge_delay(self, name: str) -> Optional[float]:
+        """Seconds to wait on `name` before hedging, or None when hedging is off or unmeasured"""
+        stats = self.stats[name]
+        if self.hedge_percentile <= 0 or len(stats.latencies) < self.min_samples:
+            return None
+        return stats.percentile(self.hedge_percentile)
+
+    def record_call(self, name: str) -> None:
+        """A call to `name` is being dispatched; for a model not closed it is the half-open trial"""
+        stats = self.stats[name]
+        stats.counters["calls"] += 1
+        if stats.state != CLOSED:
+            stats.state = HALF_OPEN
+            stats.trial_started_at = time.monotonic()
+
+    def record_cancelled(self, name: str) -> None:
+        """A call was cancelled before finishing: no verdict, so a half-open trial slot is released"""
+        stats = self.stats[name]
+        if stats.state == HALF_OPEN:
+            stats.state = OPEN  # opened_at is unchanged, so the next candidates() offers it again
+
+    def record_success(self, name: str, latency: float) -> None:
+        stats = self.stats[name]
+        stats.counters["successes"] += 1
+        stats.latencies.append(latency)
+        stats.consecutive_failures = 0
+        stats.state = CLOSED
+
+    def record_failure(self, name: str) -> None:
+        stats = self.stats[name]
+        stats.counters["failures"] += 1
+        stats.consecutive_failures += 1
+        if stats.state == HALF_OPEN or stats.consecutive_failures >= self.failure_threshold:
+            if stats.state != OPEN:
+                stats.counters["breaker_opened"] += 1
+            stats.state = OPEN
+            stats.opened_at = time.monotonic()
+
+    def record_hedge(self, primary: str, won: bool) -> None:
+        stats = self.stats[primary]
+        stats.counters["hedges_sent"] += 1
+        if won:
+            stats.counters["hedges_won"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        result = {}
+        for name in self.models:
+            stats = self.stats[name]
+            p50, p95 = stats.percentile(50), stats.percentile(95)
+            result[name] = {
+                "state": stats.state,
+                "consecutive_failures": stats.consecutive_failures,
+                "latency_p50_ms": None if p50 is None else round(p50 * 1000, 1),
+                "latency_p95_ms": None if p95 is None else round(p95 * 1000, 1),
+                **stats.counters
+            }
+        return result
@@ -0,0 +1,89 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class MultiPatternMatcher:
+    """Aho-Corasick automaton that finds every keyword in a text in one pass.
+
+    The keyword trie and its failure links are compiled into a deterministic
+    transition table (one dict per state), so scanning is a single dict lookup
+    per character regardless of how many keywords there are. Overlapping and
+    nested matches are all reported.
+
+    With `word_boundaries=True` a keyword only counts where `\\bkeyword\\b`
+    would match; the check runs only at match positions.
+    """
+
+    def __init__(self, keywords: Iterable[str], word_boundaries: bool = False, ignore_case: bool = True):
+        self.ignore_case = ignore_case
+        self.word_boundaries = word_boundaries
+        self.keywords = sorted({k.lower() if ignore_case else k for k in keywords if k})
+
+        # Trie
+        goto: List[Dict[str, int]] = [{}]
+        own: List[List[str]] = [[]]
+        for keyword in self.keywords:
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    own.append([])
+                    goto[state][ch] = nxt
+                state = nxt
+            own[state].append(keyword)
+
+        # Failure links in BFS order, folded into a full transition table
+        fail = [0] * len(goto)
+        self._delta: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        self._out: List[Tuple[str, ...]] = [()] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions = dict(self._delta[fail[state]])
+            transitions.update(goto[state])
+            self._delta[state] = transitions
+            self._out[state] = tuple(own[state]) + self._out[fail[state]]
+            for ch, child in goto[state].items():
+                fail[child] = self._delta[fail[state]].get(ch, 0) if state else 0
+                queue.append(child)
+
+    def _matches(self, text: str):
+        """Yield (keyword, end index) for every occurrence in `text`"""
+        if self.ignore_case:
+            text = text.lower()
+        delta, out = self._delta, self._out
+        state = 0
+        for end, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for keyword in out[state]:
+                    if not self.word_boundaries or self._at_boundaries(text, end - len(keyword) + 1, end):
+                        yield keyword
+
+    @staticmethod
+    def _at_boundaries(text: str, start: int, end: int) -> bool:
+        before = start > 0 and _is_word_char(text[start - 1])
+        after = end + 1 < len(text) and _is_word_char(text[end + 1])
+        return before != _is_word_char(text[start]) and after != _is_word_char(text[end])
+
+    def find_all(self, text: str) -> Set[str]:
+        """Set of keywords present in `text`"""
+        if not self.word_boundaries:
+            # Fast path: no per-match checks needed
+            if self.ignore_case:
+                text = text.lower()
+            delta, out = self._delta, self._out
+            found: Set[str] = set()
+            state = 0
+            for ch in text:
+                state = delta[state].get(ch, 0)
+                if out[state]:
+                    found.update(out[state])
+            return found
+        return set(self._matches(text))
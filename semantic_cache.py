@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import faiss
+
+
+class _DocumentQueries:
+    """Normalized query embeddings and their answers for one document"""
+
+    def __init__(self, dim: int):
+        self.index = faiss.IndexFlatIP(dim)
+        self.vectors = np.empty((0, dim), dtype="float32")
+        self.questions: List[str] = []
+        self.answers: List[str] = []
+
+    def rebuild(self) -> None:
+        self.index.reset()
+        self.index.add(self.vectors)
+
+
+class SemanticQueryCache:
+    """Reuse answers for near-duplicate questions about the same document.
+
+    Each document gets a small inner-product FAISS index over the unit-length
+    embeddings of questions already answered. A new question whose cosine
+    similarity to a cached one reaches `threshold` gets the stored answer,
+    skipping retrieval and the LLM call.
+    """
+
+    def __init__(self, threshold: float = 0.9, max_queries_per_document: int = 1000,
+                 max_documents: int = 256):
+        self.threshold = threshold
+        self.max_queries_per_document = max_queries_per_document
+        self.max_documents = max_documents
+        self._documents: "OrderedDict[str, _DocumentQueries]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalized(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.array(vectors, dtype="float32", copy=True).reshape(len(vectors), -1)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def lookup(self, document_hash: str, query_vectors: np.ndarray) -> List[Optional[Dict[str, Any]]]:
+        """Per query: {"answer", "question", "similarity"} of the closest cached question, or None"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(query_vectors)
+        with self._lock:
+            document = self._documents.get(document_hash)
+            if document is not None and document.index.ntotal and len(query_vectors):
+                self._documents.move_to_end(document_hash)
+                D, I = document.index.search(self._normalized(query_vectors), 1)
+                for row, (similarity, i) in enumerate(zip(D[:, 0], I[:, 0])):
+                    if i >= 0 and similarity >= self.threshold:
+                        results[row] = {
+                            "answer": document.answers[i],
+                            "question": document.questions[i],
+                            "similarity": float(similarity)
+                        }
+            hits = sum(1 for result in results if result is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def add(self, document_hash: str, query_vectors: np.ndarray,
+            questions: List[str], answers: List[str]) -> None:
+        if not len(query_vectors):
+            return
+        vectors = self._normalized(query_vectors)
+        with self._lock:
+            document = self._documents.get(document_hash)
+            if document is None:
+                document = self._documents[document_hash] = _DocumentQueries(vectors.shape[1])
+                while len(self._documents) > self.max_documents:
+                    self._documents.popitem(last=False)
+            self._documents.move_to_end(document_hash)
+
+            document.vectors = np.concatenate([document.vectors, vectors])
+            document.questions.extend(questions)
+            document.answers.extend(answers)
+            overflow = len(document.answers) - self.max_queries_per_document
+            if overflow > 0:
+                # Forget the oldest questions and rebuild the (small) index
+                document.vectors = document.vectors[overflow:]
+                document.questions = document.questions[overflow:]
+                document.answers = document.answers[overflow:]
+                document.rebuild()
+            else:
+                document.index.add(vectors)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "queries": sum(len(doc.answers) for doc in self._documents.values()),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses
+            }
@@ -0,0 +1,71 @@
+"""DiskAnswerCache: TTL, batched hit times and eviction once the table outgrows max_entries."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import answer_cache  # noqa: E402
+from answer_cache import DiskAnswerCache  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(answer_cache.time, "time", clock)
+    return clock
+
+
+def open_cache(tmp_path, **kwargs):
+    return DiskAnswerCache(str(tmp_path / "answers.sqlite3"), **kwargs)
+
+
+def test_expired_answer_is_a_miss(tmp_path, clock):
+    cache = open_cache(tmp_path, ttl=60)
+    cache.put("a", "thirty days")
+
+    assert cache.get("a") == "thirty days"
+    clock.now += 61
+    assert cache.get("a") is None
+
+
+def test_eviction_waits_until_max_entries_is_exceeded(tmp_path, clock):
+    cache = open_cache(tmp_path, max_entries=10)
+    for i in range(10):
+        clock.now += 1
+        cache.put(f"k{i}", "answer")
+    assert cache.stats()["entries"] == 10
+
+    clock.now += 1
+    cache.put("k10", "answer")
+    assert cache.stats()["entries"] == int(10 * DiskAnswerCache.EVICT_TO)
+
+
+def test_recent_hits_survive_eviction(tmp_path, clock):
+    cache = open_cache(tmp_path, max_entries=10)
+    for i in range(10):
+        clock.now += 1
+        cache.put(f"k{i}", "answer")
+    clock.now += 1
+    assert cache.get("k0") == "answer"  # buffered, written back before evicting
+
+    clock.now += 1
+    cache.put("k10", "answer")
+
+    assert cache.get("k0") == "answer"
+    assert cache.get("k1") is None
+
+
+def test_entries_are_shared_through_the_file(tmp_path, clock):
+    open_cache(tmp_path).put("a", "thirty days")
+
+    assert open_cache(tmp_path).get("a") == "thirty days"
@@ -0,0 +1,116 @@
+"""AsyncLLMClient against the local stub server: concurrency cap, per-call timeout and model fallback."""
+import os
+import sys
+import asyncio
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from main import LLM_MAX_CONCURRENCY, NO_ANSWER  # noqa: E402
+from llm_client import AsyncLLMClient  # noqa: E402
+from model_router import ModelRouter, OPEN  # noqa: E402
+from llm_stub_server import create_stub_app, start_stub_server  # noqa: E402
+
+CHUNKS = [{"text": "The grace period for premium payment is thirty days.", "page": 4, "type": "paragraph"}]
+
+
+@pytest.fixture
+def stub():
+    """Start a stub server from create_stub_app(**kwargs); yields (url, app) and stops it afterwards"""
+    servers = []
+
+    def start(**kwargs):
+        app = create_stub_app(**kwargs)
+        url, server = start_stub_server(app)
+        servers.append(server)
+        return url, app
+
+    yield start
+    for server in servers:
+        server.should_exit = True
+
+
+def run_with_client(coro_fn, **client_kwargs):
+    """Run coro_fn(client) on a fresh event loop with a client that is closed afterwards"""
+    async def run():
+        client = AsyncLLMClient(api_key="stub-key", **client_kwargs)
+        try:
+            return await coro_fn(client)
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+
+def test_in_flight_calls_stay_within_concurrency_cap(stub):
+    url, app = stub(latency=0.1)
+    questions = [f"What is the grace period? ({i})" for i in range(LLM_MAX_CONCURRENCY * 3)]
+
+    answers = run_with_client(
+        lambda client: asyncio.gather(*[client.answer(q, CHUNKS) for q in questions]),
+        url=url, models=["sonar"]
+    )
+
+    assert all(answer.startswith("[sonar]") for answer in answers)
+    assert len(app.state.calls) == len(questions)
+    assert 1 < app.state.max_in_flight <= LLM_MAX_CONCURRENCY
+
+
+def test_smaller_concurrency_cap_is_respected(stub):
+    url, app = stub(latency=0.05)
+
+    run_with_client(
+        lambda client: asyncio.gather(*[client.answer(f"q{i}", CHUNKS) for i in range(10)]),
+        url=url, models=["sonar"], max_concurrency=2
+    )
+
+    assert app.state.max_in_flight == 2
+
+
+def test_slow_model_hits_the_call_timeout(stub):
+    url, _ = stub(latency=1.0)
+
+    async def call(client):
+        with pytest.raises(httpx.TimeoutException):
+            await client.complete("sonar", [{"role": "user", "content": '"q"'}])
+        return await client.answer_with_model("What is the grace period?", CHUNKS)
+
+    model_name, answer = run_with_client(call, url=url, models=["sonar"], timeout=0.2)
+
+    assert model_name is None
+    assert answer == NO_ANSWER
+
+
+def test_failing_primary_falls_back_to_next_model(stub):
+    url, app = stub(latency=0.01, fail_models=["primary"])
+    router = ModelRouter(["primary", "backup"], hedge_percentile=0)
+
+    model_name, answer = run_with_client(
+        lambda client: client.answer_with_model("What is the grace period?", CHUNKS),
+        url=url, models=["primary", "backup"], router=router
+    )
+
+    assert model_name == "backup"
+    assert answer.startswith("[backup]")
+    assert app.state.calls == ["primary", "backup"]
+    assert router.stats["primary"].counters["failures"] == 1
+
+
+def test_half_open_trial_that_loses_a_hedge_is_released(stub):
+    url, app = stub(latencies={"primary": 1.0, "backup": 0.01})
+    router = ModelRouter(["primary", "backup"], failure_threshold=1, reset_timeout=0, min_samples=1)
+    router.record_call("primary")
+    router.record_failure("primary")
+    router.stats["primary"].latencies.append(0.05)  # hedge after ~50ms
+
+    model_name, _ = run_with_client(
+        lambda client: client.answer_with_model("What is the grace period?", CHUNKS),
+        url=url, models=["primary", "backup"], router=router
+    )
+
+    assert model_name == "backup"
+    assert app.state.calls[0] == "primary"
+    assert router.stats["primary"].state == OPEN
+    assert "primary" in router.candidates()
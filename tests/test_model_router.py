@@ -0,0 +1,114 @@
+"""ModelRouter circuit breaking: when open circuits become half-open trials and how they recover."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_router  # noqa: E402
+from model_router import ModelRouter, CLOSED, OPEN, HALF_OPEN  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(model_router.time, "monotonic", clock)
+    return clock
+
+
+def open_circuit(router, name):
+    for _ in range(router.failure_threshold):
+        router.record_call(name)
+        router.record_failure(name)
+    assert router.stats[name].state == OPEN
+
+
+def test_open_model_is_skipped_until_reset_timeout(clock):
+    router = ModelRouter(["a", "b"], failure_threshold=2, reset_timeout=30)
+    open_circuit(router, "a")
+
+    assert router.candidates() == ["b"]
+    clock.now += 30
+    assert router.candidates() == ["a", "b"]
+
+
+def test_offering_a_model_does_not_make_it_half_open(clock):
+    router = ModelRouter(["a", "b"], failure_threshold=1, reset_timeout=30)
+    open_circuit(router, "a")
+    clock.now += 30
+
+    # "b" answers every time, so "a" is offered but never called
+    for _ in range(5):
+        assert router.candidates() == ["a", "b"]
+        router.record_call("b")
+        router.record_success("b", 0.1)
+
+    assert router.stats["a"].state == OPEN
+
+
+def test_dispatched_trial_decides_the_circuit(clock):
+    router = ModelRouter(["a", "b"], failure_threshold=1, reset_timeout=30)
+    open_circuit(router, "a")
+    clock.now += 30
+
+    router.record_call("a")
+    assert router.stats["a"].state == HALF_OPEN
+    assert router.candidates() == ["b"]  # one trial at a time
+
+    router.record_success("a", 0.2)
+    assert router.stats["a"].state == CLOSED
+    assert router.candidates() == ["a", "b"]
+
+
+def test_failed_trial_reopens_the_circuit(clock):
+    router = ModelRouter(["a", "b"], failure_threshold=3, reset_timeout=30)
+    open_circuit(router, "a")
+    clock.now += 30
+
+    router.record_call("a")
+    router.record_failure("a")
+
+    assert router.stats["a"].state == OPEN
+    assert router.candidates() == ["b"]
+
+
+def test_stale_half_open_trial_is_offered_again(clock):
+    router = ModelRouter(["a", "b"], failure_threshold=1, reset_timeout=30)
+    open_circuit(router, "a")
+    clock.now += 30
+    router.record_call("a")  # trial whose outcome is never recorded
+
+    clock.now += 29
+    assert router.candidates() == ["b"]
+    clock.now += 1
+    assert router.candidates() == ["a", "b"]
+
+
+def test_cancelled_trial_releases_the_slot(clock):
+    router = ModelRouter(["a", "b"], failure_threshold=1, reset_timeout=30)
+    open_circuit(router, "a")
+    clock.now += 30
+
+    router.record_call("a")
+    router.record_cancelled("a")
+
+    assert router.stats["a"].state == OPEN
+    assert router.candidates() == ["a", "b"]
+
+
+def test_cancelled_call_on_closed_model_changes_nothing(clock):
+    router = ModelRouter(["a", "b"])
+    router.record_call("a")
+    router.record_cancelled("a")
+
+    assert router.stats["a"].state == CLOSED
+    assert router.stats["a"].counters["failures"] == 0